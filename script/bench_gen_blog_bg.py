@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmark gen_blog_bg.py across styles, sizes and title lengths.
+
+Every cell of the STYLES x sizes x titles matrix is rendered and encoded `--repeat`
+times; the fastest run is kept. Wall time and peak RSS are recorded per stage
+(gradient, noise, shapes, vignette, title, encode, ...) and written as JSON.
+Startup time (fresh interpreters importing gen_blog_bg, with and without Pillow, and
+running --list-styles) is measured too. With --baseline, results are compared against
+an earlier run and the script exits non-zero when a cell or startup got slower, or a
+cell hungrier, than the thresholds allow.
+
+Peak RSS per stage uses Linux's resettable high-water mark (/proc/self/clear_refs);
+elsewhere it falls back to the process-wide peak, which only ever grows.
+
+Usage:
+  python3 script/bench_gen_blog_bg.py --out bench.json
+  python3 script/bench_gen_blog_bg.py --styles default,neon --sizes 640x360,1600x900 --repeat 3
+  python3 script/bench_gen_blog_bg.py --out new.json --baseline bench.json --max-slowdown 1.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional, Sequence
+
+import PIL
+
+import gen_blog_bg
+
+SIZES = ["640x360", "1280x720", "1600x900", "1920x1080", "3840x2160", "7680x4320"]
+
+TITLES = {
+    "latin-short": ("Agent Skills", "agent · AI"),
+    "cjk-long": (
+        "Go 包命名的最佳实践：从 go-pkg-sdk 到 kit 的重构之旅，以及我们在大型单仓库里踩过的那些命名与分层的坑",
+        "Go · 编程规范 · 架构设计",
+    ),
+}
+
+
+DEFAULTS = {
+    "subtitle": "",
+    "style": "default",
+    "size": "1600x900",
+    "seed": None,
+    "font": None,
+    "noise": None,
+    "shapes": None,
+    "vignette": None,
+    "align": None,
+    "margin": None,
+}
+
+
+class StageMeter:
+    """
+    Stage observer for gen_blog_bg.observe_stages: seconds and peak RSS per stage,
+    summed over a stage's runs (e.g. once per background band). Each stage resets the
+    high-water mark, so `peak_rss_mb` keeps the running max across stages.
+    """
+
+    def __init__(self) -> None:
+        self.stages: dict[str, dict] = {}
+        self.peak_rss_mb = 0.0
+        self._t0: dict[int, float] = {}  # per thread: band stages may run concurrently
+        self._lock = threading.Lock()
+
+    def start_stage(self, name: str) -> None:
+        with self._lock:
+            self.peak_rss_mb = max(self.peak_rss_mb, gen_blog_bg._peak_rss_mb())
+        gen_blog_bg._reset_peak_rss()
+        self._t0[threading.get_ident()] = time.perf_counter()
+
+    def end_stage(self, name: str, result: object) -> None:
+        seconds = time.perf_counter() - self._t0.pop(threading.get_ident())
+        peak = gen_blog_bg._peak_rss_mb()
+        with self._lock:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "peak_rss_mb": 0.0})
+            entry["seconds"] += seconds
+            entry["peak_rss_mb"] = max(entry["peak_rss_mb"], peak)
+            self.peak_rss_mb = max(self.peak_rss_mb, peak)
+
+
+def _render_cell(style: str, size: str, title: str, subtitle: str, out: str, repeat: int, encode: str) -> dict:
+    job = {"text": title, "subtitle": subtitle, "style": style, "size": size, "out": out, "encode": encode}
+    best: Optional[dict] = None
+    for _ in range(max(1, repeat)):
+        meter = StageMeter()
+        gen_blog_bg._reset_peak_rss()
+        t0 = time.perf_counter()
+        with gen_blog_bg.observe_stages(meter):
+            gen_blog_bg._render_job(job, DEFAULTS)
+        total = time.perf_counter() - t0
+        peak = max(meter.peak_rss_mb, gen_blog_bg._peak_rss_mb())
+        run = {"total_s": total, "peak_rss_mb": peak, "stages": meter.stages}
+        if best is None or total < best["total_s"]:
+            peak = max(run["peak_rss_mb"], best["peak_rss_mb"]) if best else run["peak_rss_mb"]
+            best = dict(run, peak_rss_mb=peak)
+    assert best is not None
+    best["total_s"] = round(best["total_s"], 4)
+    for entry in best["stages"].values():
+        entry["seconds"] = round(entry["seconds"], 4)
+    return best
+
+
+def measure_startup(repeat: int) -> dict[str, float]:
+    """Best-of-`repeat` wall time in ms of fresh interpreters doing each startup step."""
+    script = os.path.abspath(gen_blog_bg.__file__)
+    load = f"import sys; sys.path.insert(0, {os.path.dirname(script)!r}); import gen_blog_bg"
+    commands = {
+        "python": [sys.executable, "-c", "pass"],
+        "import": [sys.executable, "-c", load],
+        "import_pillow": [sys.executable, "-c", f"{load}; gen_blog_bg._import_imaging()"],
+        "list_styles": [sys.executable, script, "--list-styles"],
+    }
+    startup = {}
+    for name, cmd in commands.items():
+        best = float("inf")
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            best = min(best, time.perf_counter() - t0)
+        startup[name] = round(best * 1000, 1)
+    return startup
+
+
+def _cell_key(cell: dict) -> str:
+    return f"{cell['style']}|{cell['size']}|{cell['title']}"
+
+
+def compare(results: dict, baseline: dict, max_slowdown: float, max_mem_growth: float, min_delta_ms: float) -> list[str]:
+    """Return one message per regression of `results` against `baseline` (empty if none)."""
+    base_cells = {_cell_key(c): c for c in baseline.get("results", [])}
+    problems = []
+    old_startup = baseline.get("startup_ms", {})
+    for name, new_ms in results.get("startup_ms", {}).items():
+        old_ms = old_startup.get(name)
+        if old_ms is not None and new_ms > old_ms * max_slowdown and new_ms - old_ms > min_delta_ms:
+            problems.append(f"startup {name}: {old_ms:.1f} ms -> {new_ms:.1f} ms ({new_ms / max(old_ms, 1e-9):.2f}x)")
+    for cell in results["results"]:
+        old = base_cells.get(_cell_key(cell))
+        if old is None:
+            continue
+        checks = [("total", cell["total_s"], old["total_s"])]
+        checks += [
+            (stage, entry["seconds"], old["stages"][stage]["seconds"])
+            for stage, entry in cell["stages"].items()
+            if stage in old.get("stages", {})
+        ]
+        for name, new_s, old_s in checks:
+            if new_s > old_s * max_slowdown and (new_s - old_s) * 1000 > min_delta_ms:
+                problems.append(f"{_cell_key(cell)} {name}: {old_s * 1000:.1f} ms -> {new_s * 1000:.1f} ms ({new_s / max(old_s, 1e-9):.2f}x)")
+        if cell["peak_rss_mb"] > old["peak_rss_mb"] * max_mem_growth:
+            problems.append(f"{_cell_key(cell)} peak RSS: {old['peak_rss_mb']} MB -> {cell['peak_rss_mb']} MB")
+    return problems
+
+
+def main(argv: Sequence[str]) -> int:
+    p = argparse.ArgumentParser(description="Benchmark gen_blog_bg.py per stage across styles, sizes and titles.")
+    p.add_argument("--styles", default=",".join(sorted(gen_blog_bg.STYLES)), help="Comma-separated styles (default: all).")
+    p.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated sizes (default: {','.join(SIZES)}).")
+    p.add_argument("--titles", default=",".join(TITLES), help=f"Comma-separated title sets (default: {','.join(TITLES)}).")
+    p.add_argument(
+        "--format",
+        default="jpg",
+        choices=sorted({ext[1:] for ext in gen_blog_bg.ENCODERS} - {"jpeg"}),
+        help="Output format to encode (default: jpg).",
+    )
+    p.add_argument("--encode", default="balanced", choices=gen_blog_bg.ENCODE_PRESETS, help="Encoder preset (default: balanced).")
+    p.add_argument("--repeat", type=int, default=1, help="Runs per cell; the fastest is kept (default: 1).")
+    p.add_argument("--out", default=None, help="Write results JSON here (default: stdout summary only).")
+    p.add_argument("--baseline", default=None, help="Earlier results JSON to compare against.")
+    p.add_argument("--max-slowdown", type=float, default=1.25, help="Allowed time ratio vs baseline (default: 1.25).")
+    p.add_argument("--max-mem-growth", type=float, default=1.25, help="Allowed peak RSS ratio vs baseline (default: 1.25).")
+    p.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore slowdowns smaller than this (default: 5 ms).")
+    args = p.parse_args(argv)
+
+    styles = [s for s in args.styles.split(",") if s]
+    sizes = [s for s in args.sizes.split(",") if s]
+    titles = [t for t in args.titles.split(",") if t]
+    for s in styles:
+        if s not in gen_blog_bg.STYLES:
+            p.error(f"unknown style {s!r}")
+    for t in titles:
+        if t not in TITLES:
+            p.error(f"unknown title set {t!r}; choose from {', '.join(TITLES)}")
+    for s in sizes:
+        gen_blog_bg._parse_size(s)
+
+    startup = measure_startup(max(5, args.repeat))
+    print("startup ms: " + ", ".join(f"{k} {v:.1f}" for k, v in startup.items()))
+
+    DEFAULTS["font"] = gen_blog_bg._find_font_path(None)
+    # Warm caches (font index, fonts, per-style grain tiles) so the first cells aren't charged for them.
+    # Each warm-up also writes an .svg, so a broken vector backend fails the run instead of going unnoticed.
+    with tempfile.TemporaryDirectory() as tmp:
+        for style in styles:
+            out = os.path.join(tmp, "w.jpg")
+            warm = {"text": "warm up 预热", "style": style, "size": "640x360", "out": out, "formats": "svg"}
+            gen_blog_bg._render_job(warm, DEFAULTS)
+
+        results = {
+            "meta": {
+                "render_version": gen_blog_bg.RENDER_VERSION,
+                "python": platform.python_version(),
+                "pillow": PIL.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "repeat": args.repeat,
+                "format": args.format,
+                "encode": args.encode,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
+            "startup_ms": startup,
+            "results": [],
+        }
+        print(f"{'style':10s} {'size':>10s} {'title':12s} {'total ms':>9s} {'peak MB':>8s}  slowest stages")
+        for size in sizes:
+            for style in styles:
+                for title_key in titles:
+                    title, subtitle = TITLES[title_key]
+                    out = os.path.join(tmp, f"bench.{args.format}")
+                    cell = _render_cell(style, size, title, subtitle, out, args.repeat, args.encode)
+                    cell.update(style=style, size=size, title=title_key, bytes=os.path.getsize(out))
+                    results["results"].append(cell)
+                    top = sorted(cell["stages"].items(), key=lambda kv: -kv[1]["seconds"])[:3]
+                    top_s = ", ".join(f"{k} {v['seconds'] * 1000:.0f}" for k, v in top)
+                    print(f"{style:10s} {size:>10s} {title_key:12s} {cell['total_s'] * 1000:9.1f} {cell['peak_rss_mb']:8.1f}  {top_s}")
+
+    if args.out:
+        gen_blog_bg._write_json_atomic(args.out, results)
+        print(f"Wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline, args.max_slowdown, args.max_mem_growth, args.min_delta_ms)
+        print()
+        print("=" * 50)
+        if problems:
+            print(f"{len(problems)} regression(s) vs {args.baseline}:")
+            for msg in problems:
+                print(f"  {msg}")
+            return 1
+        print(f"No regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
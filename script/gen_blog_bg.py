@@ -11,9 +11,23 @@ Usage:
   python3 script/gen_blog_bg.py --text "Go 包命名指南" --out content/posts/go-package-naming-guide/cover.jpg
   python3 script/gen_blog_bg.py --text "agent skills" --size 1920x1080 --out /tmp/bg.png
   python3 script/gen_blog_bg.py --style neon --text "agent skills" --out /tmp/bg-neon.png
+  python3 script/gen_blog_bg.py --text "agent skills" --variants og,thumb,2x --out /tmp/cover.jpg
+  python3 script/gen_blog_bg.py --text "agent skills" --formats webp,avif --encode smallest --out /tmp/cover.jpg
+  python3 script/gen_blog_bg.py --text "agent skills" --out /tmp/cover.svg  # vector cover, a few KB
+  python3 script/gen_blog_bg.py --text "agent skills" --size 7680x4320 --threads 0 --out /tmp/banner.png
   python3 script/gen_blog_bg.py --list-styles
+  python3 script/gen_blog_bg.py --gallery /tmp/styles.jpg  # every style x sample titles on one sheet
+  python3 script/gen_blog_bg.py --batch covers.jsonl --jobs 8
+  python3 script/gen_blog_bg.py --batch covers.jsonl --profile prof.jsonl --profile-pstats /tmp/pstats
+  python3 script/gen_blog_bg.py --posts  # cover.jpg for every post whose title/tags changed
+  python3 script/gen_blog_bg.py --watch  # same, then re-render covers as posts are saved
   # If --out is omitted, it writes to the current directory using a safe filename stem.
 
+Library use (fonts and caches stay warm between calls):
+  from gen_blog_bg import Renderer
+  with Renderer(style="neon", size=(1200, 630)) as r:
+      png = r.render("agent skills", "agent · AI", format="png")
+
 Install:
   python3 -m pip install Pillow
 """
@@ -21,19 +35,67 @@ Install:
 from __future__ import annotations
 
 import argparse
+import base64
+import contextvars
+import cProfile
+import csv
 import hashlib
+import importlib
+import io
+import itertools
+import json
 import math
 import os
 import random
 import re
+import select
+import struct
 import sys
+import time
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+
+class _LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access; the import also
+    rebinds the module-level name to the real module, so later lookups cost nothing extra.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        module = importlib.import_module(self._name)
+        globals()[self._name.rpartition(".")[2]] = module
+        return getattr(module, attr)
+
 
-from PIL import Image, ImageChops, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+# Pillow is loaded on the first render, so --help, --list-styles and argument checks don't pay for it.
+PIL_MODULES = ("PIL.Image", "PIL.ImageChops", "PIL.ImageDraw", "PIL.ImageEnhance", "PIL.ImageFilter", "PIL.ImageFont", "PIL.features")
+if TYPE_CHECKING:
+    from PIL import Image, ImageChops, ImageDraw, ImageEnhance, ImageFilter, ImageFont, features
+else:
+    Image, ImageChops, ImageDraw, ImageEnhance, ImageFilter, ImageFont, features = map(_LazyModule, PIL_MODULES)
+
+
+def _import_imaging() -> None:
+    """Import Pillow now (e.g. in a parent process before it starts workers) instead of on first use."""
+    for name in PIL_MODULES:
+        globals()[name.rpartition(".")[2]] = importlib.import_module(name)
 
 
 RGB = Tuple[int, int, int]
+RGBA = Tuple[int, int, int, int]
+
+# Bump whenever a change alters rendered pixels, so hash-keyed caches of outputs are invalidated.
+RENDER_VERSION = "7"
 
 
 def _stable_seed(text: str) -> int:
@@ -81,45 +143,320 @@ def _mix(a: RGB, b: RGB, t: float) -> RGB:
     )
 
 
-def _parse_size(s: str) -> Tuple[int, int]:
-    m = re.fullmatch(r"(\d+)x(\d+)", s.strip())
-    if not m:
-        raise argparse.ArgumentTypeError("size must be like 1920x1080")
-    w, h = int(m.group(1)), int(m.group(2))
+def _parse_size(s: str | Sequence[int]) -> Tuple[int, int]:
+    """Validate a size given as "1920x1080" or as a [width, height] pair (e.g. from JSON)."""
+    if isinstance(s, str):
+        m = re.fullmatch(r"(\d+)x(\d+)", s.strip())
+        if not m:
+            raise argparse.ArgumentTypeError("size must be like 1920x1080")
+        w, h = int(m.group(1)), int(m.group(2))
+    else:
+        if not isinstance(s, (list, tuple)) or len(s) != 2 or not all(isinstance(v, int) and not isinstance(v, bool) for v in s):
+            raise argparse.ArgumentTypeError("size must be like 1920x1080 or [1920, 1080]")
+        w, h = s
     if w < 320 or h < 200:
         raise argparse.ArgumentTypeError("size too small; try >= 320x200")
     return w, h
 
 
+class _LRUCache:
+    """
+    Small thread-safe LRU mapping holding at most `maxsize` entries.
+
+    With `weigh` (value -> int, e.g. bytes) and `maxweight`, least recently used
+    entries are also evicted while the total weight exceeds `maxweight`.
+    """
+
+    def __init__(self, maxsize: int, maxweight: Optional[int] = None, weigh: Optional[Callable[[Any], int]] = None) -> None:
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigh = weigh
+        self.weight = 0
+        self._data: OrderedDict = OrderedDict()
+        self._weights: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self.weight -= self._weights.pop(key, 0)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.weigh is not None:
+                self._weights[key] = self.weigh(value)
+                self.weight += self._weights[key]
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._data and (
+            len(self._data) > max(0, self.maxsize) or (self.maxweight is not None and self.weight > self.maxweight)
+        ):
+            old, _ = self._data.popitem(last=False)
+            self.weight -= self._weights.pop(old, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _image_bytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+def _cache_dir() -> str:
+    """Per-user cache directory for indexes and precomputed layers ($XDG_CACHE_HOME/gen_blog_bg)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "gen_blog_bg")
+
+
+# Object with start_stage(name) / end_stage(name, result) methods, notified around each
+# pipeline stage of renders in the current context (thread/task); see `observe_stages`.
+_STAGE_OBSERVER: ContextVar[Optional[Any]] = ContextVar("_STAGE_OBSERVER", default=None)
+# Canvas rows (y0, y1) of the band whose stages are running, for observers to tag them with.
+_STAGE_BAND: ContextVar[Optional[Tuple[int, int]]] = ContextVar("_STAGE_BAND", default=None)
+
+
+@contextmanager
+def observe_stages(observer: Any) -> Iterator[Any]:
+    """Report pipeline stages of renders made inside the `with` block to `observer`."""
+    token = _STAGE_OBSERVER.set(observer)
+    try:
+        yield observer
+    finally:
+        _STAGE_OBSERVER.reset(token)
+
+
+def _staged(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    observer = _STAGE_OBSERVER.get()
+    if observer is None:
+        return fn(*args, **kwargs)
+    observer.start_stage(name)
+    result = fn(*args, **kwargs)
+    observer.end_stage(name, result)
+    return result
+
+
+def _read_hwm_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            m = re.search(r"^VmHWM:\s+(\d+)\s+kB", f.read(), re.MULTILINE)
+        return int(m.group(1)) if m else None
+    except OSError:
+        return None
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the peak-RSS high-water mark to the current RSS (Linux only); False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    """Peak RSS since the last `_reset_peak_rss` (or process start where resetting is unsupported)."""
+    kb = _read_hwm_kb()
+    if kb is None:
+        import resource
+
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            kb //= 1024  # macOS reports bytes.
+    return round(kb / 1024, 1)
+
+
+class RenderProfile:
+    """
+    Stage observer that builds a JSON-ready record of one render: milliseconds and
+    peak RSS per stage, the size/mode/bytes of each stage's output image, and the
+    encoded size. Peak RSS is per stage on Linux; elsewhere it is the process peak.
+    Background stages run once per band and carry that band's "rows"; with several
+    threads they overlap, so their peaks are shared rather than per stage.
+
+        with observe_stages(RenderProfile(text=title)) as prof:
+            img = generate_image(...)
+        record = prof.finish()
+    """
+
+    def __init__(self, **info: Any) -> None:
+        self.record: dict = dict(info, stages=[])
+        self._peak = 0.0
+        _reset_peak_rss()
+        self._start = time.perf_counter()
+        self._t0: dict[int, float] = {}  # per thread: band stages may run concurrently
+
+    def start_stage(self, name: str) -> None:
+        self._peak = max(self._peak, _peak_rss_mb())
+        _reset_peak_rss()
+        self._t0[threading.get_ident()] = time.perf_counter()
+
+    def end_stage(self, name: str, result: Any) -> None:
+        ms = round((time.perf_counter() - self._t0.pop(threading.get_ident())) * 1000, 3)
+        peak = _peak_rss_mb()
+        self._peak = max(self._peak, peak)
+        entry: dict = {"stage": name, "ms": ms, "peak_rss_mb": peak}
+        band = _STAGE_BAND.get()
+        if band is not None:
+            entry["rows"] = list(band)
+        if isinstance(result, Image.Image):
+            entry.update(size=list(result.size), mode=result.mode, bytes=_image_bytes(result))
+        elif name == "encode" and isinstance(result, int):
+            entry["bytes_out"] = result
+        self.record["stages"].append(entry)
+
+    def finish(self) -> dict:
+        self.record["total_ms"] = round((time.perf_counter() - self._start) * 1000, 3)
+        self.record["peak_rss_mb"] = max(self._peak, _peak_rss_mb())
+        return self.record
+
+
+FONT_DIRS = {
+    "darwin": ["/System/Library/Fonts", "/Library/Fonts", "~/Library/Fonts"],
+    "win32": [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")],
+    "linux": ["/usr/share/fonts", "/usr/local/share/fonts", "~/.local/share/fonts", "~/.fonts"],
+}
+FONT_EXTS = (".ttf", ".ttc", ".otf", ".otc")
+
+# Auto-detected faces by file name (lowercase), best first: Chinese-capable fonts, then common
+# Latin fonts. A "#N" suffix selects face N of a collection (2 = Simplified Chinese in Noto CJK).
+PREFERRED_FONTS = [
+    "pingfang.ttc",
+    "hiragino sans gb.ttc",
+    "stheiti medium.ttc",
+    "stheiti light.ttc",
+    "notosanscjksc-regular.otf",
+    "notosanscjk-regular.ttc#2",
+    "notosanscjk-medium.ttc#2",
+    "sourcehansanssc-regular.otf",
+    "wqy-microhei.ttc",
+    "wqy-zenhei.ttc",
+    "droidsansfallbackfull.ttf",
+    "droidsansfallback.ttf",
+    "msyh.ttc",
+    "simhei.ttf",
+    "arial unicode.ttf",
+    "arial unicode ms.ttf",
+    "helvetica.ttf",
+    "arial.ttf",
+    "dejavusans.ttf",
+    "liberationsans-regular.ttf",
+]
+
+_FONT_INDEX: Optional[dict] = None
+_FONT_CACHE = _LRUCache(maxsize=32)
+
+
+def _font_dirs() -> list[str]:
+    platform = "linux" if sys.platform.startswith("linux") else sys.platform
+    return [os.path.expanduser(d) for d in FONT_DIRS.get(platform, FONT_DIRS["linux"])]
+
+
+def _dir_mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return -1.0
+
+
+def _build_font_index(roots: Sequence[str]) -> dict:
+    dirs = {root: _dir_mtime(root) for root in roots}
+    fonts: list[str] = []
+    for root in roots:
+        for dirpath, _dirnames, filenames in os.walk(root):
+            dirs[dirpath] = _dir_mtime(dirpath)
+            fonts.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(FONT_EXTS))
+    fonts.sort()
+
+    by_name = {}
+    for path in fonts:
+        by_name.setdefault(os.path.basename(path).lower(), path)
+    default = None
+    for name in PREFERRED_FONTS:
+        base, _, face = name.partition("#")
+        if base in by_name:
+            default = by_name[base] + (f"#{face}" if face else "")
+            break
+    return {"version": 1, "dirs": dirs, "fonts": fonts, "default": default}
+
+
+def _font_index() -> dict:
+    """
+    Return the system font index, loading it from the on-disk cache when still valid.
+
+    The index is rebuilt only when one of the scanned directories changed (mtime)
+    or a font root appeared/disappeared; the result is memoized per process.
+    """
+    global _FONT_INDEX
+    if _FONT_INDEX is not None:
+        return _FONT_INDEX
+
+    roots = _font_dirs()
+    path = os.path.join(_cache_dir(), "font-index.json")
+    index = None
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+        dirs = index.get("dirs", {})
+        if index.get("version") != 1 or any(r not in dirs for r in roots):
+            index = None
+        elif any(_dir_mtime(d) != m for d, m in dirs.items()):
+            index = None
+    except (OSError, ValueError, AttributeError):
+        index = None
+
+    if index is None:
+        index = _build_font_index(roots)
+        try:
+            _write_json_atomic(path, index)
+        except OSError:
+            pass  # Read-only home: keep the in-memory index.
+    _FONT_INDEX = index
+    return index
+
+
 def _find_font_path(user_font: Optional[str]) -> Optional[str]:
     if user_font:
         return user_font
-    # Prefer Chinese-capable fonts on macOS; fall back to common system fonts.
-    candidates = [
-        "/System/Library/Fonts/PingFang.ttc",
-        "/System/Library/Fonts/STHeiti Medium.ttc",
-        "/System/Library/Fonts/STHeiti Light.ttc",
-        "/System/Library/Fonts/Hiragino Sans GB.ttc",
-        "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",
-        "/System/Library/Fonts/Supplemental/Arial Unicode MS.ttf",
-        "/Library/Fonts/Arial Unicode.ttf",
-        "/Library/Fonts/Arial Unicode MS.ttf",
-        "/System/Library/Fonts/Supplemental/Helvetica.ttf",
-        "/System/Library/Fonts/Supplemental/Arial.ttf",
-    ]
-    for p in candidates:
-        if os.path.exists(p):
-            return p
-    return None
+    return _font_index().get("default")
 
 
 def _load_font(path: Optional[str], size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-    if path:
+    """Load `path` (optionally "file.ttc#N" for face N) at `size`, cached per (path, size, index)."""
+    file, index = path, 0
+    if path and "#" in path:
+        file, _, face = path.rpartition("#")
+        index = int(face) if face.isdigit() else 0
+    key = (file, size, index)
+    font = _cache("fonts").get(key)
+    if font is not None:
+        return font
+
+    font = None
+    if file:
         try:
-            return ImageFont.truetype(path, size=size)
+            font = ImageFont.truetype(file, size=size, index=index)
         except Exception:
             pass
-    return ImageFont.load_default()
+    if font is None:
+        try:
+            font = ImageFont.load_default(size=size)
+        except TypeError:  # Pillow < 10.1 only has the fixed-size bitmap font.
+            font = ImageFont.load_default()
+    _cache("fonts").put(key, font)
+    return font
 
 
 def _is_cjk(char: str) -> bool:
@@ -136,41 +473,110 @@ def _is_cjk(char: str) -> bool:
     )
 
 
-def _wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: int) -> Sequence[str]:
+class _GlyphMetrics:
+    """
+    Per-font cache of glyph advances and pair kerning corrections.
+
+    The width of a string is the sum of its glyph advances plus, for every adjacent
+    pair, `getlength(a + b) - advance(a) - advance(b)`; with basic layout that equals
+    `textlength` exactly, but each glyph and pair is measured only once per font.
+    """
+
+    def __init__(self, font: ImageFont.ImageFont) -> None:
+        self.font = font
+        self._advance: dict[str, float] = {}
+        self._kern: dict[str, float] = {}
+
+    def advance(self, ch: str) -> float:
+        a = self._advance.get(ch)
+        if a is None:
+            a = self._advance[ch] = self.font.getlength(ch)
+        return a
+
+    def kern(self, a: str, b: str) -> float:
+        pair = a + b
+        k = self._kern.get(pair)
+        if k is None:
+            k = self._kern[pair] = self.font.getlength(pair) - self.advance(a) - self.advance(b)
+        return k
+
+    def width(self, text: str) -> float:
+        total = 0.0
+        prev = ""
+        for ch in text:
+            total += self.advance(ch) + (self.kern(prev, ch) if prev else 0.0)
+            prev = ch
+        return total
+
+
+_GLYPH_METRICS: "weakref.WeakKeyDictionary[Any, _GlyphMetrics]" = weakref.WeakKeyDictionary()
+
+
+def _glyph_metrics(font: ImageFont.ImageFont) -> _GlyphMetrics:
+    m = _GLYPH_METRICS.get(font)
+    if m is None:
+        m = _GLYPH_METRICS[font] = _GlyphMetrics(font)
+    return m
+
+
+@dataclass(frozen=True)
+class TextLine:
+    text: str
+    width: int
+    height: int
+
+
+def _wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: int) -> Sequence[TextLine]:
+    """
+    Greedily wrap `text` to `max_width` in one linear scan over cached glyph widths.
+
+    Each returned line carries its bbox width/height (measured once here), so callers
+    can lay the block out without measuring again.
+    """
     text = re.sub(r"\s+", " ", text.strip())
     if not text:
         return []
+    gm = _glyph_metrics(font)
+    lines: list[str] = []
 
     # If it has spaces, wrap by words; otherwise wrap by characters (for CJK).
     if " " in text:
-        parts = text.split(" ")
-        lines: list[str] = []
         cur = ""
-        for w in parts:
-            trial = w if not cur else f"{cur} {w}"
-            if draw.textlength(trial, font=font) <= max_width:
-                cur = trial
+        cur_w = 0.0
+        for word in text.split(" "):
+            word_w = gm.width(word)
+            if not cur:
+                trial_w = word_w
+            else:
+                trial_w = cur_w + gm.kern(cur[-1], " ") + gm.advance(" ") + gm.kern(" ", word[0]) + word_w
+            if trial_w <= max_width:
+                cur = word if not cur else f"{cur} {word}"
+                cur_w = trial_w
             else:
                 if cur:
                     lines.append(cur)
-                cur = w
+                cur, cur_w = word, word_w
         if cur:
             lines.append(cur)
-        return lines
-
-    # No spaces: prefer CJK char wrapping, but still works for long latin strings.
-    lines = []
-    cur = ""
-    for ch in text:
-        trial = f"{cur}{ch}"
-        if cur and draw.textlength(trial, font=font) > max_width:
+    else:
+        # No spaces: prefer CJK char wrapping, but still works for long latin strings.
+        cur = ""
+        cur_w = 0.0
+        for ch in text:
+            trial_w = cur_w + gm.advance(ch) + (gm.kern(cur[-1], ch) if cur else 0.0)
+            if cur and trial_w > max_width:
+                lines.append(cur)
+                cur, cur_w = ch, gm.advance(ch)
+            else:
+                cur, cur_w = cur + ch, trial_w
+        if cur:
             lines.append(cur)
-            cur = ch
-        else:
-            cur = trial
-    if cur:
-        lines.append(cur)
-    return lines
+
+    out = []
+    for line in lines:
+        b = draw.textbbox((0, 0), line, font=font)
+        out.append(TextLine(text=line, width=b[2] - b[0], height=b[3] - b[1]))
+    return out
 
 
 @dataclass(frozen=True)
@@ -316,52 +722,145 @@ def _make_palette(rng: random.Random, *, theme: str, variant: str) -> Palette:
     return Palette(c1=c1, c2=c2, accent=accent, text=text)
 
 
-def _linear_gradient(size: Tuple[int, int], c_top: RGB, c_bottom: RGB, horizontal: bool) -> Image.Image:
+GradientStop = Tuple[float, RGB]
+
+# Direction of the default background gradient, in degrees within the unit square
+# (0 = left->right, 90 = top->bottom). Equivalent to the former 65/35 blend of a
+# vertical c1->c2 gradient with a horizontal c2->c1 gradient.
+DIAGONAL_ANGLE = math.degrees(math.atan2(0.65, -0.35))
+
+
+def _ramp_colors(stops: Sequence[GradientStop], steps: int = 256) -> list[RGB]:
+    """Sample a multi-stop gradient into `steps` colors using `_mix` between neighbouring stops."""
+    stops = sorted(stops, key=lambda s: s[0])
+    if not stops:
+        raise ValueError("gradient needs at least one stop")
+    out: list[RGB] = []
+    for i in range(steps):
+        t = i / max(1, steps - 1)
+        if t <= stops[0][0]:
+            out.append(stops[0][1])
+            continue
+        if t >= stops[-1][0]:
+            out.append(stops[-1][1])
+            continue
+        for (p0, a), (p1, b) in zip(stops, stops[1:]):
+            if p0 <= t <= p1:
+                out.append(_mix(a, b, (t - p0) / (p1 - p0) if p1 > p0 else 0.0))
+                break
+    return out
+
+
+_RAMP_CACHE = _LRUCache(maxsize=64)
+
+
+def _linear_gradient(
+    size: Tuple[int, int], stops: Sequence[GradientStop], angle: float, rows: Optional[Tuple[int, int]] = None
+) -> Image.Image:
+    """
+    Render a linear gradient in one pass.
+
+    The gradient parameter for every pixel comes from a single affine resample of a
+    precomputed 1x256 ramp; colors are then applied through a 256-entry palette built
+    from the stops. `angle` is measured in normalized (unit-square) coordinates, so the
+    gradient always runs corner-to-corner the same way regardless of aspect ratio.
+
+    With `rows` = (y0, y1), only that band of the `size` canvas is rendered.
+    """
     w, h = size
-    img = Image.new("RGB", (w, h), c_top)
-    px = img.load()
-    if horizontal:
-        for x in range(w):
-            t = x / max(1, w - 1)
-            c = _mix(c_top, c_bottom, t)
-            for y in range(h):
-                px[x, y] = c
-    else:
-        for y in range(h):
-            t = y / max(1, h - 1)
-            c = _mix(c_top, c_bottom, t)
-            for x in range(w):
-                px[x, y] = c
-    return img
+    y0, y1 = rows or (0, h)
+    dx, dy = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    corners = [0.0, dx, dy, dx + dy]
+    lo, span = min(corners), (max(corners) - min(corners)) or 1.0
+
+    # Output pixel (x, y) samples ramp row 255 * (dx * x/(w-1) + dy * y/(h-1) - lo) / span.
+    # Pillow samples at pixel centers (x + 0.5, y + 0.5) and NEAREST floors, hence the +0.5 terms.
+    a = 255 * dx / (max(1, w - 1) * span)
+    b = 255 * dy / (max(1, h - 1) * span)
+    c = -255 * lo / span + 0.5 - 0.5 * (a + b) + b * y0
+    ramp = Image.frombytes("L", (1, 256), bytes(range(256)))
+    param = ramp.transform((w, y1 - y0), Image.AFFINE, (0, 0, 0.5, a, b, c), resample=Image.NEAREST, fillcolor=255)
+
+    key = tuple(stops)
+    palette = _cache("ramps").get(key)
+    if palette is None:
+        palette = [v for color in _ramp_colors(stops) for v in color]
+        _cache("ramps").put(key, palette)
+    param.putpalette(palette)
+    return param.convert("RGB")
+
+
+GRAIN_TILE = 256
+GRAIN_SEED = 0x6772616E
+_GRAIN_CACHE = _LRUCache(maxsize=32)
+
+
+def _grain_tile(sigma: int) -> Image.Image:
+    """
+    Seeded, tileable grain for one sigma bucket: the former effect_noise + contrast/brightness
+    treatment, generated once per process on a GRAIN_TILE x GRAIN_TILE tile.
 
+    Independent per-pixel noise has no structure across tile edges, so it tiles seamlessly.
+    """
+    tile = _cache("grain").get(sigma)
+    if tile is not None:
+        return tile
+    rnd = random.Random(GRAIN_SEED + sigma)
+    gauss = rnd.gauss
+    data = bytes(max(0, min(255, int(128 + sigma * gauss(0.0, 1.0)))) for _ in range(GRAIN_TILE * GRAIN_TILE))
+    tile = Image.frombytes("L", (GRAIN_TILE, GRAIN_TILE), data)
+    tile = ImageEnhance.Contrast(tile).enhance(1.6)
+    tile = ImageEnhance.Brightness(tile).enhance(0.6)
+    _cache("grain").put(sigma, tile)
+    return tile
 
-def _add_noise(base: Image.Image, rng: random.Random, amount: float) -> Image.Image:
-    if amount <= 0:
-        return base
-    w, h = base.size
 
-    # effect_noise is deterministic based on seed within Pillow; we vary via sigma and rotate.
-    sigma = 20 + int(60 * amount)
-    noise = Image.effect_noise((w, h), sigma).convert("L")
-    noise = noise.rotate(rng.uniform(-2, 2), resample=Image.BICUBIC, expand=False)
+def _grain_sigma(amount: float) -> int:
+    return 20 + 10 * int(6 * amount)  # Bucketed so a handful of tiles cover every amount.
 
-    # Convert noise into subtle RGB grain and blend using soft light-ish approach.
-    grain = Image.merge("RGB", (noise, noise, noise))
-    grain = ImageEnhance.Contrast(grain).enhance(1.6)
-    grain = ImageEnhance.Brightness(grain).enhance(0.6)
 
-    # Overlay with low opacity by difference + screen mix for texture.
-    mixed = ImageChops.screen(base, grain)
-    return Image.blend(base, mixed, alpha=_clamp(0.10 * amount, 0.0, 0.25))
+def _grain_mask(rng: random.Random, amount: float) -> Optional[Tuple[Image.Image, int, int]]:
+    """
+    Grain for one render: the mask tile and its (x, y) offset on the canvas, or None for no grain.
 
+    Makes the noise stage's single rng draw; `_add_noise` then applies it band by band.
+    """
+    if amount <= 0:
+        return None
+    sigma = _grain_sigma(amount)
+    alpha = _clamp(0.10 * amount, 0.0, 0.25)
 
-def _add_shapes(img: Image.Image, rng: random.Random, palette: Palette, density: float) -> Image.Image:
-    if density <= 0:
+    # Screen with grain g then blend by alpha == base + alpha * g * (255 - base) / 255,
+    # i.e. pasting white through a mask of alpha * g.
+    mask_tile = _grain_tile(sigma).point([int(round(v * alpha)) for v in range(256)])
+    offset = int(rng.random() * GRAIN_TILE * GRAIN_TILE)  # One draw, like the old rotation angle.
+    return mask_tile, offset % GRAIN_TILE, offset // GRAIN_TILE
+
+
+def _add_noise(img: Image.Image, grain: Optional[Tuple[Image.Image, int, int]], top: int = 0) -> Image.Image:
+    """Add `grain` (see `_grain_mask`) in place (and return it); `img` holds canvas rows from `top` down."""
+    if grain is None:
         return img
+    mask_tile, ox, oy = grain
     w, h = img.size
-    layer = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    d = ImageDraw.Draw(layer)
+    # Paste tile by tile (Pillow clips boxes at the edges), so no canvas-sized mask is needed.
+    for y in range(-((top + oy) % GRAIN_TILE), h, GRAIN_TILE):
+        for x in range(-ox, w, GRAIN_TILE):
+            img.paste((255, 255, 255), (x, y, x + GRAIN_TILE, y + GRAIN_TILE), mask_tile)
+    return img
+
+
+@dataclass(frozen=True)
+class _Shape:
+    kind: str  # "circle" | "stripe" (coords = bbox) | "poly" (coords = x, y pairs)
+    fill: RGBA
+    coords: Tuple[float, ...]
 
+
+def _shape_specs(rng: random.Random, palette: Palette, density: float, size: Tuple[int, int]) -> list[_Shape]:
+    """Draw the decorative shapes for a `size` canvas from `rng`; shared by the raster and SVG backends."""
+    w, h = size
+    shapes = []
     n = int(8 + density * 18)
     for _ in range(n):
         kind = rng.choice(["circle", "poly", "stripe"])
@@ -373,15 +872,15 @@ def _add_shapes(img: Image.Image, rng: random.Random, palette: Palette, density:
             r = int(min(w, h) * rng.uniform(0.06, 0.18))
             cx = int(rng.uniform(-0.1, 1.1) * w)
             cy = int(rng.uniform(-0.1, 1.1) * h)
-            d.ellipse([cx - r, cy - r, cx + r, cy + r], fill=fill)
+            shapes.append(_Shape(kind, fill, (cx - r, cy - r, cx + r, cy + r)))
         elif kind == "stripe":
             x0 = int(rng.uniform(-0.2, 1.0) * w)
             y0 = int(rng.uniform(0.0, 1.0) * h)
             x1 = x0 + int(w * rng.uniform(0.4, 1.2))
             y1 = y0 + int(h * rng.uniform(0.02, 0.08))
-            d.rounded_rectangle([x0, y0, x1, y1], radius=int(min(w, h) * 0.02), fill=fill)
+            shapes.append(_Shape(kind, fill, (x0, y0, x1, y1)))
         else:  # poly
-            pts = []
+            pts: list[float] = []
             k = rng.randint(3, 6)
             cx = rng.uniform(0.0, 1.0) * w
             cy = rng.uniform(0.0, 1.0) * h
@@ -390,39 +889,173 @@ def _add_shapes(img: Image.Image, rng: random.Random, palette: Palette, density:
             for i in range(k):
                 ang = start + i * (math.tau / k) + rng.uniform(-0.25, 0.25)
                 rr = radius * rng.uniform(0.65, 1.15)
-                pts.append((cx + math.cos(ang) * rr, cy + math.sin(ang) * rr))
-            d.polygon(pts, fill=fill)
+                pts += [cx + math.cos(ang) * rr, cy + math.sin(ang) * rr]
+            shapes.append(_Shape(kind, fill, tuple(pts)))
+    return shapes
 
-    layer = layer.filter(ImageFilter.GaussianBlur(radius=max(2, int(min(w, h) * 0.008))))
-    return Image.alpha_composite(img.convert("RGBA"), layer).convert("RGB")
 
+def _shape_blur(size: Tuple[int, int]) -> int:
+    return max(2, int(min(size) * 0.008))
 
-def _add_vignette(img: Image.Image, strength: float) -> Image.Image:
-    if strength <= 0:
+
+def _blur_halo(radius: float) -> int:
+    """Rows beyond a band that a Gaussian blur of `radius` reads (its support, plus rounding slack)."""
+    return 3 * math.ceil(radius) + 3
+
+
+def _draw_shapes(
+    layer: Image.Image, specs: Sequence[_Shape], canvas_size: Tuple[int, int], scale: float = 1.0, top: int = 0
+) -> None:
+    """
+    Draw `specs` (canvas coordinates) onto the RGBA `layer` at `scale`, where `layer`
+    holds rows `top`.. of the scaled canvas. Shapes that miss those rows are skipped.
+    """
+    d = ImageDraw.Draw(layer)
+    radius = int(min(canvas_size) * 0.02 * scale)
+    for shape in specs:
+        coords = [c * scale for c in shape.coords] if scale != 1.0 else list(shape.coords)
+        ys = coords[1::2]
+        if max(ys) < top - 1 or min(ys) > top + layer.height + 1:
+            continue
+        if top:
+            coords[1::2] = [y - top for y in ys]
+        if shape.kind == "circle":
+            d.ellipse(coords, fill=shape.fill)
+        elif shape.kind == "stripe":
+            d.rounded_rectangle(coords, radius=radius, fill=shape.fill)
+        else:
+            d.polygon(list(zip(coords[::2], coords[1::2])), fill=shape.fill)
+
+
+def _shapes_layer(specs: Sequence[_Shape], canvas_size: Tuple[int, int], scale: float) -> Image.Image:
+    """
+    The shapes drawn and blurred whole at `scale` (< 1) of the canvas, for `_add_scaled_shapes`.
+
+    The layer is low-frequency after the blur, so upsampling it keeps the look while the
+    cost drops with scale squared. Shape geometry (and rng use) does not depend on `scale`.
+    """
+    w, h = canvas_size
+    layer = Image.new("RGBA", (max(1, round(w * scale)), max(1, round(h * scale))), (0, 0, 0, 0))
+    _draw_shapes(layer, specs, canvas_size, scale)
+    return layer.filter(ImageFilter.GaussianBlur(radius=_shape_blur(canvas_size) * scale))
+
+
+def _add_shapes(img: Image.Image, specs: Sequence[_Shape], canvas_size: Tuple[int, int], top: int = 0) -> Image.Image:
+    """
+    Composite blurred translucent shapes over `img` in place (and return it), where `img`
+    holds canvas rows `top`.. of a `canvas_size` canvas.
+
+    Only the band plus a halo wider than the blur support is drawn and blurred, so bands
+    render independently and the temporaries stay band-sized.
+    """
+    if not specs:
         return img
-    w, h = img.size
+    w, h = canvas_size
+    radius = _shape_blur(canvas_size)
+    y0, y1 = top, top + img.height
+    lo, hi = max(0, y0 - _blur_halo(radius)), min(h, y1 + _blur_halo(radius))
+    layer = Image.new("RGBA", (w, hi - lo), (0, 0, 0, 0))
+    _draw_shapes(layer, specs, canvas_size, top=lo)
+    layer = layer.filter(ImageFilter.GaussianBlur(radius=radius)).crop((0, y0 - lo, w, y1 - lo))
+    img.paste(layer, (0, 0), layer)  # Over an opaque base, alpha compositing == pasting through alpha.
+    return img
+
+
+def _add_scaled_shapes(img: Image.Image, layer: Image.Image, canvas_size: Tuple[int, int], top: int = 0) -> Image.Image:
+    """Like `_add_shapes` for a reduced `_shapes_layer`: upsample just the rows covering `img`."""
+    w, h = canvas_size
+    sy = layer.height / h
+    band = layer.resize((w, img.height), resample=Image.BILINEAR, box=(0, top * sy, layer.width, (top + img.height) * sy))
+    img.paste(band, (0, 0), band)
+    return img
+
+
+_VIGNETTE_CACHE = _LRUCache(maxsize=32, maxweight=128 * 1024 * 1024, weigh=_image_bytes)
+
+
+def _vignette_mask(size: Tuple[int, int], strength: float, rows: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    Ready-to-paste vignette mask: per-pixel darkening already scaled by the blend strength.
+    With `rows` = (y0, y1), only that band of the `size` mask.
+
+    All tone adjustments run on the 256x256 source, so building a mask costs one resize;
+    masks are memoized per (size, strength, rows) and must not be modified by callers.
+    """
+    key = (size, round(strength, 4), rows)
+    mask = _cache("vignette").get(key)
+    if mask is not None:
+        return mask
+    src = _vignette_source(strength)
+    if rows is None:
+        mask = src.resize(size, resample=Image.BICUBIC)
+    else:
+        y0, y1 = rows
+        sy = src.height / size[1]
+        mask = src.resize((size[0], y1 - y0), resample=Image.BICUBIC, box=(0, y0 * sy, src.width, y1 * sy))
+    _cache("vignette").put(key, mask)
+    return mask
+
+
+def _vignette_source(strength: float) -> Image.Image:
+    """The 256x256 vignette mask for `strength`, which `_vignette_mask` resamples to size."""
+    key = ("source", round(strength, 4))
+    src = _cache("vignette").get(key)
+    if src is not None:
+        return src
+
     try:
-        mask = Image.radial_gradient("L").resize((w, h), resample=Image.BICUBIC)
+        src = Image.radial_gradient("L")
     except Exception:
         # Fallback: center-bright mask approximated with a blurred rectangle.
-        mask = Image.new("L", (w, h), 0)
-        d = ImageDraw.Draw(mask)
-        inset = int(min(w, h) * 0.12)
-        d.rectangle([inset, inset, w - inset, h - inset], fill=255)
-        mask = mask.filter(ImageFilter.GaussianBlur(radius=int(min(w, h) * 0.15)))
+        src = Image.new("L", (256, 256), 0)
+        d = ImageDraw.Draw(src)
+        d.rectangle([31, 31, 225, 225], fill=255)
+        src = src.filter(ImageFilter.GaussianBlur(radius=38))
 
     # radial_gradient("L") is bright at center, dark at edges; invert to darken edges.
-    mask = ImageChops.invert(mask)
-    mask = ImageEnhance.Contrast(mask).enhance(1.35)
-    mask = ImageEnhance.Brightness(mask).enhance(0.75)
+    src = ImageChops.invert(src)
+    src = ImageEnhance.Contrast(src).enhance(1.35)
+    src = ImageEnhance.Brightness(src).enhance(0.75)
+    alpha = _clamp(0.35 * strength, 0.0, 0.55)
+    src = src.point([int(round(v * alpha)) for v in range(256)])
+    _cache("vignette").put(key, src)
+    return src
+
+
+def _add_vignette(img: Image.Image, strength: float, canvas_size: Tuple[int, int], top: int = 0) -> Image.Image:
+    """Darken the edges of `img` in place (and return it); `img` holds canvas rows `top`.. of `canvas_size`."""
+    if strength <= 0:
+        return img
+    mask = _vignette_mask(canvas_size, strength, rows=(top, top + img.height))
+    # Composite with black through the mask, then blend by alpha == paste black through alpha * mask.
+    img.paste((0, 0, 0), (0, 0, img.width, img.height), mask)
+    return img
 
-    dark = Image.new("RGB", (w, h), (0, 0, 0))
-    out = Image.composite(dark, img, mask)  # take dark where mask bright
-    return Image.blend(img, out, alpha=_clamp(0.35 * strength, 0.0, 0.55))
 
+@dataclass(frozen=True)
+class _TextRun:
+    xy: Tuple[int, int]
+    text: str
+    font: Any  # ImageFont.FreeTypeFont | ImageFont.ImageFont
+    size: int
+    fill: RGBA
+    shadow: RGBA
+    shadow_offset: int
 
-def _draw_title(
-    img: Image.Image,
+
+@dataclass(frozen=True)
+class _TitleLayout:
+    scrim: Tuple[int, int, int, int]
+    scrim_radius: int
+    scrim_fill: RGBA
+    bar: Tuple[int, int, int, int]
+    bar_radius: int
+    bar_fill: RGBA
+    runs: Tuple[_TextRun, ...]
+
+
+def _layout_title(
+    size: Tuple[int, int],
     title: str,
     subtitle: str,
     font_path: Optional[str],
@@ -430,11 +1063,10 @@ def _draw_title(
     theme: str,
     margin_ratio: float,
     align: str,
-) -> Image.Image:
-    w, h = img.size
-    base = img.convert("RGBA")
-    layer = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(layer)
+) -> _TitleLayout:
+    """Wrap and place the title block (scrim, accent bar, text lines); shared by the raster and SVG backends."""
+    w, h = size
+    draw = ImageDraw.Draw(Image.new("L", (1, 1)))
 
     margin = int(min(w, h) * _clamp(margin_ratio, 0.04, 0.12))
     max_text_width = w - 2 * margin
@@ -445,19 +1077,17 @@ def _draw_title(
     title_font = _load_font(font_path, size=title_size)
     subtitle_font = _load_font(font_path, size=subtitle_size)
 
-    title_lines = _wrap_text(draw, title, title_font, max_text_width)
-    subtitle_lines = _wrap_text(draw, subtitle, subtitle_font, max_text_width) if subtitle else []
+    title_wrapped = _wrap_text(draw, title, title_font, max_text_width)
+    subtitle_wrapped = _wrap_text(draw, subtitle, subtitle_font, max_text_width) if subtitle else []
+    title_lines = [line.text for line in title_wrapped]
+    subtitle_lines = [line.text for line in subtitle_wrapped]
 
     # Measure block.
     line_gap = int(title_size * 0.22)
     sub_gap = int(subtitle_size * 0.35)
 
-    def text_bbox(line: str, fnt: ImageFont.ImageFont) -> Tuple[int, int]:
-        b = draw.textbbox((0, 0), line, font=fnt)
-        return b[2] - b[0], b[3] - b[1]
-
-    title_metrics = [text_bbox(line, title_font) for line in title_lines] or [(0, 0)]
-    subtitle_metrics = [text_bbox(line, subtitle_font) for line in subtitle_lines] or []
+    title_metrics = [(line.width, line.height) for line in title_wrapped] or [(0, 0)]
+    subtitle_metrics = [(line.width, line.height) for line in subtitle_wrapped]
 
     block_w = max([m[0] for m in title_metrics] + ([m[0] for m in subtitle_metrics] if subtitle_metrics else [0]))
     block_h = sum(m[1] for m in title_metrics) + line_gap * max(0, len(title_lines) - 1)
@@ -482,53 +1112,394 @@ def _draw_title(
     # Background scrim behind text.
     pad_x = int(min(w, h) * 0.030)
     pad_y = int(min(w, h) * 0.022)
-    scrim = [x0 - pad_x, y0 - pad_y, x0 + block_w + pad_x, y0 + block_h + pad_y]
+    scrim = (x0 - pad_x, y0 - pad_y, x0 + block_w + pad_x, y0 + block_h + pad_y)
     scrim_fill = (255, 255, 255, 170) if is_light else (0, 0, 0, 110)
-    draw.rounded_rectangle(scrim, radius=int(min(w, h) * 0.028), fill=scrim_fill)
 
     # Decorative accent bar.
     bar_w = int(min(block_w, w - 2 * margin) * 0.18)
     bar_h = max(6, int(min(w, h) * 0.010))
-    bar = [x0, y0 - int(pad_y * 0.8) - bar_h - 6, x0 + bar_w, y0 - int(pad_y * 0.8) - 6]
-    draw.rounded_rectangle(bar, radius=bar_h // 2, fill=(palette.accent[0], palette.accent[1], palette.accent[2], 210))
+    bar = (x0, y0 - int(pad_y * 0.8) - bar_h - 6, x0 + bar_w, y0 - int(pad_y * 0.8) - 6)
 
-    # Draw title text with subtle shadow.
+    def line_x(lw: int) -> int:
+        if align == "center":
+            return x0 + (block_w - lw) // 2
+        if align == "right":
+            return x0 + (block_w - lw)
+        return x0
+
+    # Title text with subtle shadow.
     shadow = (255, 255, 255, 150) if is_light else (0, 0, 0, 160)
     fg = (palette.text[0], palette.text[1], palette.text[2], 255)
-
+    runs = []
     y = y0
     for i, line in enumerate(title_lines):
         lw, lh = title_metrics[i]
-        if align == "center":
-            x = x0 + (block_w - lw) // 2
-        elif align == "right":
-            x = x0 + (block_w - lw)
-        else:
-            x = x0
-        draw.text((x + 2, y + 2), line, font=title_font, fill=shadow)
-        draw.text((x, y), line, font=title_font, fill=fg)
+        runs.append(_TextRun((line_x(lw), y), line, title_font, title_size, fg, shadow, 2))
         y += lh + line_gap
 
     if subtitle_lines:
         y += int(title_size * 0.18)
+        if is_light:
+            sub_fill, sub_shadow = (35, 38, 44, 220), (255, 255, 255, 140)
+        else:
+            sub_fill, sub_shadow = (230, 233, 238, 230), (0, 0, 0, 140)
         for i, line in enumerate(subtitle_lines):
             lw, lh = subtitle_metrics[i]
-            if align == "center":
-                x = x0 + (block_w - lw) // 2
-            elif align == "right":
-                x = x0 + (block_w - lw)
-            else:
-                x = x0
-            if is_light:
-                draw.text((x + 1, y + 1), line, font=subtitle_font, fill=(255, 255, 255, 140))
-                draw.text((x, y), line, font=subtitle_font, fill=(35, 38, 44, 220))
-            else:
-                draw.text((x + 1, y + 1), line, font=subtitle_font, fill=(0, 0, 0, 140))
-                draw.text((x, y), line, font=subtitle_font, fill=(230, 233, 238, 230))
+            runs.append(_TextRun((line_x(lw), y), line, subtitle_font, subtitle_size, sub_fill, sub_shadow, 1))
             y += lh + sub_gap
 
-    composed = Image.alpha_composite(base, layer).convert("RGB")
-    return composed
+    return _TitleLayout(
+        scrim=scrim,
+        scrim_radius=int(min(w, h) * 0.028),
+        scrim_fill=scrim_fill,
+        bar=bar,
+        bar_radius=bar_h // 2,
+        bar_fill=(palette.accent[0], palette.accent[1], palette.accent[2], 210),
+        runs=tuple(runs),
+    )
+
+
+def _draw_title(
+    img: Image.Image,
+    title: str,
+    subtitle: str,
+    font_path: Optional[str],
+    palette: Palette,
+    theme: str,
+    margin_ratio: float,
+    align: str,
+) -> Image.Image:
+    """
+    Draw the title block onto `img` in place (and return it).
+
+    The block is composited through an RGBA layer covering only its bounding box
+    (scrim, accent bar and text), so the cost follows the text area, not the canvas.
+    Lines sharing colors are rasterized once into a coverage mask that is pasted twice:
+    offset, as the shadow, then in place, as the text.
+    """
+    layout = _layout_title(img.size, title, subtitle, font_path, palette, theme, margin_ratio, align)
+    boxes = [layout.scrim, layout.bar]
+    for run in layout.runs:
+        left, top, right, bottom = run.font.getbbox(run.text)
+        x, y = run.xy
+        boxes.append((x + left, y + top, x + right + run.shadow_offset, y + bottom + run.shadow_offset))
+    pad = 4  # Antialiasing can spill a pixel or two past the measured boxes.
+    # Not clipped to the canvas: a shadow may come from text that overflows its edge. The final paste clips.
+    x0, y0 = min(b[0] for b in boxes) - pad, min(b[1] for b in boxes) - pad
+    x1, y1 = max(b[2] for b in boxes) + pad, max(b[3] for b in boxes) + pad
+
+    def shift(box: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        return (box[0] - x0, box[1] - y0, box[2] - x0, box[3] - y0)
+
+    layer = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    draw.rounded_rectangle(shift(layout.scrim), radius=layout.scrim_radius, fill=layout.scrim_fill)
+    draw.rounded_rectangle(shift(layout.bar), radius=layout.bar_radius, fill=layout.bar_fill)
+    for (fill, shadow, offset), runs in itertools.groupby(layout.runs, key=lambda r: (r.fill, r.shadow, r.shadow_offset)):
+        coverage = Image.new("L", layer.size, 0)
+        mask_draw = ImageDraw.Draw(coverage)
+        for run in runs:
+            mask_draw.text((run.xy[0] - x0, run.xy[1] - y0), run.text, font=run.font, fill=255)
+        # Pasting a color through coverage blends exactly like drawing the text in that color.
+        layer.paste(shadow, (offset, offset), coverage)
+        layer.paste(fill, (0, 0), coverage)
+
+    img.paste(layer, (x0, y0), layer)
+    return img
+
+
+# --quality tiers: (background scale, shapes-layer scale relative to the background).
+# "high" renders everything at full resolution. "draft" renders the low-frequency layers
+# (gradient, blurred shapes, vignette) at a quarter of the size and blows them up with
+# nearest-neighbour (bilinear upsampling alone costs more than the whole quarter-size
+# render); the grain is then added at full resolution, so it looks like the final render.
+QUALITY_SCALES = {
+    "draft": (0.25, 1.0),
+    "normal": (1.0, 0.5),
+    "high": (1.0, 1.0),
+}
+
+
+# Minimum rows per band of the banded background pipeline (see _render_background).
+COMPOSITE_BAND = 512
+
+
+def _band_rows(size: Tuple[int, int]) -> int:
+    # At least 8 halos per band keeps the re-blurred halo rows under ~25% extra work.
+    return max(COMPOSITE_BAND, 8 * _blur_halo(_shape_blur(size)))
+
+
+def _band_spans(size: Tuple[int, int]) -> list[Tuple[int, int]]:
+    h, rows = size[1], _band_rows(size)
+    return [(y0, min(h, y0 + rows)) for y0 in range(0, h, rows)]
+
+
+def _run_band(render_band: Callable[[int, int], Image.Image], y0: int, y1: int) -> Image.Image:
+    token = _STAGE_BAND.set((y0, y1))
+    try:
+        return render_band(y0, y1)
+    finally:
+        _STAGE_BAND.reset(token)
+
+
+def _render_bands(size: Tuple[int, int], render_band: Callable[[int, int], Image.Image], threads: int = 1) -> Image.Image:
+    """
+    Assemble a `size` RGB image from `render_band(y0, y1)` calls over horizontal bands.
+
+    With `threads` > 1 bands render concurrently on a thread pool (Pillow releases the GIL
+    in its transform, blur, resize and paste loops) and are pasted as they finish, so each
+    worker only holds band-sized temporaries. The band layout only depends on `size`.
+    Bands run in a copy of the caller's context, so stage observers (tagged with the
+    band's rows, see _STAGE_BAND) and Renderer caches apply inside pool threads too.
+    """
+    spans = _band_spans(size)
+    canvas = Image.new("RGB", size)
+    if threads <= 1:
+        for y0, y1 in spans:
+            canvas.paste(_run_band(render_band, y0, y1), (0, y0))
+        return canvas
+    with ThreadPoolExecutor(max_workers=min(threads, len(spans))) as pool:
+        pending = {pool.submit(contextvars.copy_context().run, _run_band, render_band, y0, y1): y0 for y0, y1 in spans}
+        for fut in as_completed(list(pending)):
+            canvas.paste(fut.result(), (0, pending.pop(fut)))
+    return canvas
+
+
+def _scaled_background_size(size: Tuple[int, int], quality: str) -> Tuple[int, int]:
+    """Resolution the background is rendered at for `quality`, before upsampling to `size`."""
+    scale = QUALITY_SCALES[quality][0]
+    return size if scale == 1.0 else (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+
+
+def _warm_background(size: Tuple[int, int], noise: float, vignette: float, quality: str = "high") -> None:
+    """
+    Build the grain tile and vignette masks every `size` background with these settings
+    shares, e.g. once before rendering many such backgrounds on threads.
+    """
+    size = _scaled_background_size(size, quality)
+    if noise > 0:
+        _grain_tile(_grain_sigma(noise))
+    if vignette > 0:
+        for rows in _band_spans(size):
+            _vignette_mask(size, vignette, rows=rows)
+
+
+def _render_background(
+    size: Tuple[int, int],
+    rng: random.Random,
+    palette: Palette,
+    noise: float,
+    shapes: float,
+    vignette: float,
+    quality: str = "high",
+    threads: int = 1,
+) -> Image.Image:
+    """
+    Render the text-independent background, band by band (see `_render_bands`).
+
+    All rng draws happen up front, in the same order as ever, so every band is a pure
+    function of its rows and the output does not depend on `threads`. Stages are
+    reported once per band (see `_render_bands`). A reduced-size background gets its
+    grain after upsampling, on top of the vignette, so the grain keeps its full-size look.
+    """
+    full_size, size = size, _scaled_background_size(size, quality)
+    shapes_scale = QUALITY_SCALES[quality][1]
+
+    grain = _grain_mask(rng, noise)
+    specs = _shape_specs(rng, palette, shapes, size) if shapes > 0 else []
+    small = None
+    if specs and shapes_scale != 1.0:
+        small = _staged("shapes", _shapes_layer, specs, size, shapes_scale)
+    # Background gradient: diagonal c1 -> c2.
+    stops = [(0.0, palette.c1), (1.0, palette.c2)]
+
+    def render_band(y0: int, y1: int) -> Image.Image:
+        band = _staged("gradient", _linear_gradient, size, stops, angle=DIAGONAL_ANGLE, rows=(y0, y1))
+        if size == full_size:
+            band = _staged("noise", _add_noise, band, grain, top=y0)
+        if small is not None:
+            band = _staged("shapes", _add_scaled_shapes, band, small, size, top=y0)
+        else:
+            band = _staged("shapes", _add_shapes, band, specs, size, top=y0)
+        return _staged("vignette", _add_vignette, band, vignette, size, top=y0)
+
+    img = _render_bands(size, render_band, threads)
+    if img.size == full_size:
+        return img
+    sy = img.height / full_size[1]
+
+    def upsample_band(y0: int, y1: int) -> Image.Image:
+        band = _staged(
+            "upsample", img.resize, (full_size[0], y1 - y0), resample=Image.NEAREST, box=(0, y0 * sy, img.width, y1 * sy)
+        )
+        return _staged("noise", _add_noise, band, grain, top=y0)
+
+    return _render_bands(full_size, upsample_band, threads)
+
+
+# Text-independent backgrounds for --background-key renders: in memory, then on disk.
+_BACKGROUND_CACHE = _LRUCache(maxsize=16, maxweight=256 * 1024 * 1024, weigh=_image_bytes)
+BACKGROUND_DISK_LIMIT = 512 * 1024 * 1024
+
+
+def _prune_dir(path: str, max_bytes: int) -> None:
+    """Delete the least recently modified files in `path` until it holds at most `max_bytes`."""
+    try:
+        entries = [e for e in os.scandir(path) if e.is_file()]
+    except OSError:
+        return
+    stats = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries), reverse=True)
+    total = 0
+    for _mtime, size, file in stats:
+        total += size
+        if total > max_bytes:
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+
+
+def _cached_background(
+    key: str,
+    size: Tuple[int, int],
+    rng: random.Random,
+    palette: Palette,
+    noise: float,
+    shapes: float,
+    vignette: float,
+    quality: str = "high",
+    threads: int = 1,
+) -> Image.Image:
+    """
+    Return the background for `key` + render parameters, rendering it only on a cache miss.
+
+    The returned image is shared with the cache and must not be modified in place.
+    """
+    blob = json.dumps([RENDER_VERSION, key, list(size), palette.c1, palette.c2, noise, shapes, vignette, quality])
+    digest = hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+    img = _cache("backgrounds").get(digest)
+    if img is not None:
+        return img
+
+    path = os.path.join(_cache_dir(), "backgrounds", f"{digest}.png")
+    try:
+        with Image.open(path) as f:
+            img = f.convert("RGB")
+        os.utime(path)  # Mark as recently used for pruning.
+    except (OSError, ValueError):
+        img = _render_background(size, rng, palette, noise, shapes, vignette, quality, threads)
+        try:
+            _ensure_parent_dir(path)
+            tmp = f"{path}.tmp{os.getpid()}"
+            img.save(tmp, format="PNG", compress_level=1)
+            os.replace(tmp, path)
+            _prune_dir(os.path.dirname(path), BACKGROUND_DISK_LIMIT)
+        except OSError:
+            pass  # Read-only cache dir: keep the in-memory copy only.
+    _cache("backgrounds").put(digest, img)
+    return img
+
+
+def _background_size(sizes: Sequence[Tuple[int, int]]) -> Tuple[int, int]:
+    """Smallest canvas with the aspect ratio of sizes[0] that covers every size once center-cropped."""
+    pw, ph = sizes[0]
+    k = max(1.0, max(max(w / pw, h / ph) for w, h in sizes))
+    return int(math.ceil(pw * k - 1e-9)), int(math.ceil(ph * k - 1e-9))
+
+
+def _fit_background(bg: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """Center-crop `bg` to the aspect ratio of `size` and resample it down to `size`."""
+    bw, bh = bg.size
+    w, h = size
+    if (bw, bh) == (w, h):
+        return bg
+    if w * bh > h * bw:  # target is wider than the background
+        cw, ch = bw, max(1, round(bw * h / w))
+    else:
+        cw, ch = max(1, round(bh * w / h)), bh
+    x0, y0 = (bw - cw) // 2, (bh - ch) // 2
+    return bg.resize((w, h), Image.LANCZOS, box=(x0, y0, x0 + cw, y0 + ch), reducing_gap=3.0)
+
+
+def _seeded_palette(
+    text: str, style: str, seed: Optional[int], background_key: Optional[str]
+) -> Tuple[StyleSpec, random.Random, Palette]:
+    """Style preset, the rng every later stage draws from, and the palette drawn first from it."""
+    style_spec = STYLES.get(style, STYLES["default"])
+    if background_key:
+        seed_text = f"bg|{background_key}|{style}"
+    else:
+        seed_text = f"{text}|{style}"
+    rng = random.Random(_stable_seed(seed_text) if seed is None else seed)
+    return style_spec, rng, _make_palette(rng, theme=style_spec.theme, variant=style_spec.variant)
+
+
+def generate_variants(
+    text: str,
+    subtitle: str,
+    sizes: Sequence[Tuple[int, int]],
+    seed: Optional[int],
+    style: str,
+    font_path: Optional[str],
+    noise: float,
+    shapes: float,
+    vignette: float,
+    align: str,
+    margin_ratio: float,
+    background_key: Optional[str] = None,
+    quality: str = "high",
+    threads: int = 1,
+) -> list[Image.Image]:
+    """
+    Render the same cover at several sizes/aspect ratios, one image per entry of `sizes`.
+
+    The background is rendered once, large enough to cover every size, then
+    cropped/resampled per size; only the title is laid out again for each one.
+
+    With `background_key`, palette and background are seeded from the key instead of
+    the title and cached (memory + disk), so retitling only redraws the text.
+
+    `quality` ("draft" | "normal" | "high", see QUALITY_SCALES) trades background and
+    shapes-layer resolution for speed; "high" is the full-resolution reference render.
+
+    `threads` > 1 renders the background's bands concurrently, for very large sizes;
+    the pixels are the same for any value.
+    """
+    if quality not in QUALITY_SCALES:
+        raise ValueError(f"unknown quality {quality!r}; choose from {', '.join(QUALITY_SCALES)}")
+    style_spec, rng, palette = _seeded_palette(text, style, seed, background_key)
+
+    bg_size = _background_size(sizes)
+    if background_key:
+        background = _cached_background(
+            f"{background_key}|{style}|{seed}", bg_size, rng, palette, noise, shapes, vignette, quality, threads
+        )
+    else:
+        background = _render_background(bg_size, rng, palette, noise, shapes, vignette, quality, threads)
+
+    images = []
+    for i, size in enumerate(sizes):
+        base = _staged("fit", _fit_background, background, size)
+        if base is background and (background_key or i < len(sizes) - 1):
+            # The title is drawn in place: keep a cached, or still needed, background intact.
+            base = base.copy()
+        if i == len(sizes) - 1:
+            del background  # Only the per-size images are needed from here on.
+        if text.strip():
+            base = _staged(
+                "title",
+                _draw_title,
+                base,
+                title=text,
+                subtitle=subtitle,
+                font_path=font_path,
+                palette=palette,
+                theme=style_spec.theme,
+                margin_ratio=margin_ratio,
+                align=align,
+            )
+        images.append(base)
+    return images
 
 
 def generate_image(
@@ -543,32 +1514,216 @@ def generate_image(
     vignette: float,
     align: str,
     margin_ratio: float,
+    background_key: Optional[str] = None,
+    quality: str = "high",
+    threads: int = 1,
 ) -> Image.Image:
-    style_spec = STYLES.get(style, STYLES["default"])
-    rng = random.Random(_stable_seed(f"{text}|{style}") if seed is None else seed)
-    palette = _make_palette(rng, theme=style_spec.theme, variant=style_spec.variant)
+    return generate_variants(
+        text=text,
+        subtitle=subtitle,
+        sizes=[size],
+        seed=seed,
+        style=style,
+        font_path=font_path,
+        noise=noise,
+        shapes=shapes,
+        vignette=vignette,
+        align=align,
+        margin_ratio=margin_ratio,
+        background_key=background_key,
+        quality=quality,
+        threads=threads,
+    )[0]
+
+
+# Vector backend: the same palette, rng draws and layout as the raster pipeline, as SVG.
+SVG_GRAIN_TILE = 96
+_SVG_GRAIN_CACHE = _LRUCache(maxsize=32)
+_SVG_VIGNETTE_CACHE = _LRUCache(maxsize=32)
+SVG_FONT_FALLBACKS = (
+    "PingFang SC", "Hiragino Sans GB", "Noto Sans CJK SC", "Source Han Sans SC", "Microsoft YaHei", "sans-serif",
+)
+
+
+def _xml_escape(text: str, quote: bool = False) -> str:
+    # xml.sax.saxutils.escape, minus its import cost (it pulls in urllib.request).
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text.replace('"', "&quot;") if quote else text
+
+
+def _svg_num(v: float, digits: int = 1) -> str:
+    return f"{v:.{digits}f}".rstrip("0").rstrip(".") if v != int(v) else str(int(v))
+
+
+def _svg_fill(color: Sequence[int]) -> str:
+    fill = f'fill="#{color[0]:02x}{color[1]:02x}{color[2]:02x}"'
+    if len(color) > 3 and color[3] != 255:
+        fill += f' fill-opacity="{_svg_num(color[3] / 255, 3)}"'
+    return fill
+
+
+def _svg_grain_uri(sigma: int, alpha: float) -> str:
+    """PNG data URI of a SVG_GRAIN_TILE crop of the raster grain, as white with the grain mask as alpha."""
+    key = (sigma, round(alpha, 4))
+    uri = _cache("svg_grain").get(key)
+    if uri is None:
+        mask = _grain_tile(sigma).crop((0, 0, SVG_GRAIN_TILE, SVG_GRAIN_TILE)).point([int(round(v * alpha)) for v in range(256)])
+        tile = Image.merge("LA", (Image.new("L", mask.size, 255), mask))
+        buf = io.BytesIO()
+        tile.save(buf, format="PNG", optimize=True)
+        uri = "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+        _cache("svg_grain").put(key, uri)
+    return uri
+
+
+def _svg_vignette_stops(strength: float) -> str:
+    """radialGradient stops sampled from the raster vignette mask, center to corner."""
+    key = round(strength, 4)
+    stops = _cache("svg_vignette").get(key)
+    if stops is None:
+        mask = _vignette_mask((256, 256), strength)
+        stops = "".join(
+            f'<stop offset="{_svg_num(t / 8, 3)}" stop-opacity="{_svg_num(mask.getpixel((128 + k, 128 + k)) / 255, 3)}"/>'
+            for t, k in ((t, min(127, round(t * 127 / 8))) for t in range(9))
+        )
+        _cache("svg_vignette").put(key, stops)
+    return stops
+
 
-    # Background gradient: diagonal-ish by mixing horizontal + vertical.
-    base_v = _linear_gradient(size, palette.c1, palette.c2, horizontal=False)
-    base_h = _linear_gradient(size, palette.c2, palette.c1, horizontal=True)
-    base = Image.blend(base_v, base_h, alpha=0.35)
+def generate_svg(
+    text: str,
+    subtitle: str,
+    size: Tuple[int, int],
+    seed: Optional[int],
+    style: str,
+    font_path: Optional[str],
+    noise: float,
+    shapes: float,
+    vignette: float,
+    align: str,
+    margin_ratio: float,
+    background_key: Optional[str] = None,
+    grain: bool = False,
+) -> str:
+    """
+    Render the cover as an SVG document instead of pixels.
+
+    Palette, shapes and title layout come from the same seed and rng draws as
+    `generate_image`; blur, vignette and text are left to the SVG renderer, so the
+    result matches closely but not pixel for pixel. Grain is only embedded (as a
+    small tiled PNG) with `grain`, since it dominates the file size.
+    """
+    style_spec, rng, palette = _seeded_palette(text, style, seed, background_key)
+    w, h = size
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">', "<defs>"]
+
+    # Gradient: same unit-square direction as _linear_gradient.
+    dx, dy = math.cos(math.radians(DIAGONAL_ANGLE)), math.sin(math.radians(DIAGONAL_ANGLE))
+    corners = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (1.0, 1.0)]
+    x1, y1 = min(corners, key=lambda c: dx * c[0] + dy * c[1])
+    span = max(dx * c[0] + dy * c[1] for c in corners) - (dx * x1 + dy * y1)
+    x2, y2 = x1 + dx * span, y1 + dy * span
+    parts.append(
+        f'<linearGradient id="bg" x1="{x1:.4g}" y1="{y1:.4g}" x2="{x2:.4g}" y2="{y2:.4g}">'
+        f'<stop offset="0" stop-color="#{bytes(palette.c1).hex()}"/><stop offset="1" stop-color="#{bytes(palette.c2).hex()}"/>'
+        "</linearGradient>"
+    )
+    body = ['<rect width="100%" height="100%" fill="url(#bg)"/>']
+
+    if noise > 0:
+        sigma = _grain_sigma(noise)
+        offset = int(rng.random() * GRAIN_TILE * GRAIN_TILE)  # Same draw as _add_noise.
+        if grain:
+            ox, oy = offset % SVG_GRAIN_TILE, (offset // GRAIN_TILE) % SVG_GRAIN_TILE
+            t = SVG_GRAIN_TILE
+            parts.append(
+                f'<pattern id="grain" width="{t}" height="{t}" x="{-ox}" y="{-oy}" patternUnits="userSpaceOnUse">'
+                f'<image width="{t}" height="{t}" href="{_svg_grain_uri(sigma, _clamp(0.10 * noise, 0.0, 0.25))}"/></pattern>'
+            )
+            body.append('<rect width="100%" height="100%" fill="url(#grain)"/>')
+
+    if shapes > 0:
+        blur = _shape_blur(size)
+        parts.append(f'<filter id="blur" x="-10%" y="-10%" width="120%" height="120%"><feGaussianBlur stdDeviation="{blur}"/></filter>')
+        body.append('<g filter="url(#blur)">')
+        radius = _svg_num(int(min(w, h) * 0.02))
+        for shape in _shape_specs(rng, palette, shapes, size):
+            fill = _svg_fill(shape.fill)
+            if shape.kind == "circle":
+                x0, y0, x1_, _y1 = shape.coords
+                r = (x1_ - x0) / 2
+                body.append(f'<circle cx="{_svg_num(x0 + r)}" cy="{_svg_num(y0 + r)}" r="{_svg_num(r)}" {fill}/>')
+            elif shape.kind == "stripe":
+                x0, y0, x1_, y1_ = shape.coords
+                body.append(
+                    f'<rect x="{_svg_num(x0)}" y="{_svg_num(y0)}" width="{_svg_num(x1_ - x0)}" height="{_svg_num(y1_ - y0)}" '
+                    f'rx="{radius}" {fill}/>'
+                )
+            else:
+                pts = " ".join(_svg_num(c) for c in shape.coords)
+                body.append(f'<polygon points="{pts}" {fill}/>')
+        body.append("</g>")
 
-    base = _add_noise(base, rng, amount=noise)
-    base = _add_shapes(base, rng, palette, density=shapes)
-    base = _add_vignette(base, strength=vignette)
+    if vignette > 0:
+        parts.append(f'<radialGradient id="vig" r="0.7071">{_svg_vignette_stops(vignette)}</radialGradient>')
+        body.append('<rect width="100%" height="100%" fill="url(#vig)"/>')
 
     if text.strip():
-        base = _draw_title(
-            base,
-            title=text,
-            subtitle=subtitle,
-            font_path=font_path,
-            palette=palette,
-            theme=style_spec.theme,
-            margin_ratio=margin_ratio,
-            align=align,
+        layout = _layout_title(size, text, subtitle, font_path, palette, style_spec.theme, margin_ratio, align)
+        sx0, sy0, sx1, sy1 = layout.scrim
+        bx0, by0, bx1, by1 = layout.bar
+        body.append(
+            f'<rect x="{sx0}" y="{sy0}" width="{sx1 - sx0}" height="{sy1 - sy0}" rx="{layout.scrim_radius}" {_svg_fill(layout.scrim_fill)}/>'
+            f'<rect x="{bx0}" y="{by0}" width="{bx1 - bx0}" height="{by1 - by0}" rx="{layout.bar_radius}" {_svg_fill(layout.bar_fill)}/>'
         )
-    return base
+        family = ", ".join(SVG_FONT_FALLBACKS)
+        if layout.runs and isinstance(layout.runs[0].font, ImageFont.FreeTypeFont):
+            family = f"'{layout.runs[0].font.getname()[0]}', {family}"
+        body.append(f'<g font-family="{_xml_escape(family, quote=True)}">')
+        for run in layout.runs:
+            x, y = run.xy
+            # Pillow places text by its ascender line; SVG by the baseline.
+            ascent = run.font.getmetrics()[0] if hasattr(run.font, "getmetrics") else run.size
+            line = _xml_escape(run.text)
+            o = run.shadow_offset
+            body.append(
+                f'<text x="{x + o}" y="{y + ascent + o}" font-size="{run.size}" {_svg_fill(run.shadow)}>{line}</text>'
+                f'<text x="{x}" y="{y + ascent}" font-size="{run.size}" {_svg_fill(run.fill)}>{line}</text>'
+            )
+        body.append("</g>")
+
+    parts.append("</defs>")
+    return "".join(parts + body) + "</svg>\n"
+
+
+# Named --variants; "Nx" (e.g. "2x") scales the main --size instead.
+VARIANT_SIZES = {
+    "og": (1200, 630),
+    "thumb": (400, 225),
+}
+
+
+def _parse_variants(spec: str, size: Tuple[int, int]) -> list[Tuple[str, Tuple[int, int]]]:
+    """Parse "og,thumb,2x,800x800" into (suffix, size) pairs relative to the main `size`."""
+    out = []
+    for item in (x.strip() for x in spec.split(",")):
+        if not item:
+            continue
+        if item in VARIANT_SIZES:
+            out.append((item, VARIANT_SIZES[item]))
+            continue
+        m = re.fullmatch(r"(\d+(?:\.\d+)?)x", item)
+        if m:
+            k = float(m.group(1))
+            if k <= 0:
+                raise ValueError(f"bad variant scale {item!r}")
+            out.append((item, (max(1, round(size[0] * k)), max(1, round(size[1] * k)))))
+            continue
+        try:
+            out.append((item, _parse_size(item)))
+        except argparse.ArgumentTypeError as e:
+            raise ValueError(f"bad variant {item!r}: use {', '.join(VARIANT_SIZES)}, Nx or WxH ({e})") from None
+    return out
 
 
 def _ensure_parent_dir(path: str) -> None:
@@ -597,6 +1752,904 @@ def _safe_filename_stem(text: str) -> str:
     return f"blog-bg-{h}"
 
 
+# Encoder presets per output extension: (Pillow format, {preset: save kwargs}).
+# "fast" favours encode time, "smallest" favours bytes; "balanced" is the default.
+ENCODE_PRESETS = ("fast", "balanced", "smallest")
+ENCODERS: dict[str, Tuple[str, dict[str, dict]]] = {
+    ".jpg": (
+        "JPEG",
+        {
+            "fast": {"quality": 90, "subsampling": 1},
+            "balanced": {"quality": 92, "subsampling": 1, "optimize": True},
+            "smallest": {"quality": 85, "subsampling": 2, "optimize": True, "progressive": True},
+        },
+    ),
+    ".png": (
+        "PNG",
+        {
+            # optimize=True is very slow on grainy images and only saves a few percent.
+            "fast": {"compress_level": 1},
+            "balanced": {"compress_level": 6},
+            "smallest": {"optimize": True},
+        },
+    ),
+    ".webp": (
+        "WEBP",
+        {
+            "fast": {"quality": 85, "method": 2},
+            "balanced": {"quality": 85, "method": 4},
+            "smallest": {"quality": 80, "method": 6},
+        },
+    ),
+}
+ENCODERS[".jpeg"] = ENCODERS[".jpg"]
+# Listed unconditionally so the table loads without Pillow; see _encoder_available.
+ENCODERS[".avif"] = (
+    "AVIF",
+    {
+        "fast": {"quality": 70, "speed": 8},
+        "balanced": {"quality": 65, "speed": 6},
+        "smallest": {"quality": 60, "speed": 4},
+    },
+)
+
+
+def _encoder_available(ext: str) -> bool:
+    """Whether this Pillow can write `ext`; AVIF needs a Pillow built with libavif."""
+    return ext in ENCODERS and (ext != ".avif" or features.check("avif"))
+
+
+def _save_kwargs(ext: str, preset: str = "balanced") -> dict:
+    if preset not in ENCODE_PRESETS:
+        raise ValueError(f"unknown encode preset {preset!r}; choose from {', '.join(ENCODE_PRESETS)}")
+    encoder = ENCODERS.get(ext.lower())
+    return dict(encoder[1][preset]) if encoder else {}
+
+
+def _parse_formats(spec: str) -> list[str]:
+    """Parse "webp,avif" into [".webp", ".avif"], rejecting formats this Pillow can't write."""
+    exts = []
+    for part in spec.split(","):
+        ext = "." + part.strip().lower().lstrip(".")
+        if ext == ".":
+            continue
+        if ext != ".svg" and not _encoder_available(ext):
+            available = [e[1:] for e in ENCODERS if _encoder_available(e)]
+            raise ValueError(f"unsupported format {part.strip()!r}; choose from {', '.join(available + ['svg'])}")
+        if ext not in exts:
+            exts.append(ext)
+    return exts
+
+
+def _encode(img: Image.Image, out: str, preset: str = "balanced") -> int:
+    img.save(out, **_save_kwargs(os.path.splitext(out)[1], preset))
+    return os.path.getsize(out)
+
+
+def _encode_all(outputs: Sequence[Tuple[Image.Image, str]], preset: str) -> int:
+    # Pillow releases the GIL inside its encoders, so threads encode in parallel.
+    with ThreadPoolExecutor(max_workers=min(len(outputs), os.cpu_count() or 1)) as pool:
+        return sum(pool.map(lambda item: _encode(item[0], item[1], preset), outputs))
+
+
+def _save_image(img: Image.Image, out: str, preset: str = "balanced") -> None:
+    _ensure_parent_dir(out)
+    _staged("encode", _encode, img, out, preset)
+
+
+def _save_images(outputs: Sequence[Tuple[Image.Image, str]], preset: str = "balanced") -> None:
+    """
+    Encode every (image, path) pair with the `preset` encoder settings.
+
+    Several outputs are encoded concurrently and reported as one "encode" stage
+    whose result is the total number of bytes written.
+    """
+    if len(outputs) == 1:
+        _save_image(outputs[0][0], outputs[0][1], preset)
+        return
+    for _img, out in outputs:
+        _ensure_parent_dir(out)
+    _staged("encode", _encode_all, outputs, preset)
+
+
+# Keys a batch manifest item may set; anything missing falls back to the CLI values.
+JOB_KEYS = (
+    "text", "subtitle", "style", "size", "out", "seed", "font", "noise", "shapes", "vignette", "align", "margin", "variants",
+    "background_key", "quality", "formats", "encode", "svg_grain", "threads",
+)
+
+
+def _resolve_job(job: dict, defaults: dict, max_size: Optional[Tuple[int, int]] = None) -> Tuple[dict, str]:
+    """
+    Turn a job described by `job`, with gaps filled from `defaults`, into
+    `generate_image` keyword arguments and an output path.
+
+    Both dicts use JOB_KEYS; `None` for noise/shapes/vignette/align/margin means
+    "use the style preset". Invalid values raise ValueError, as do sizes with more
+    pixels than `max_size` (for untrusted jobs, e.g. the render server's requests).
+    """
+    opts = dict(defaults)
+    opts.update({k: v for k, v in job.items() if k in JOB_KEYS})
+
+    text = str(opts.get("text") or "")
+    if not text.strip():
+        raise ValueError("'text' is required")
+    style = str(opts.get("style") or "default")
+    if style not in STYLES:
+        raise ValueError(f"unknown style {style!r}; choose from {', '.join(sorted(STYLES))}")
+    style_spec = STYLES[style]
+
+    size = _parse_size(opts.get("size") or "1600x900")
+    if max_size is not None and size[0] * size[1] > max_size[0] * max_size[1]:
+        raise ValueError(f"size {size[0]}x{size[1]} is larger than the maximum {max_size[0]}x{max_size[1]}")
+    seed = opts.get("seed")
+    seed = None if seed in (None, "") else int(seed)
+
+    def pick(key: str, preset: float) -> float:
+        v = opts.get(key)
+        return preset if v in (None, "") else _clamp(float(v), 0.0, 2.0)
+
+    align = opts.get("align") or style_spec.align
+    if align not in {"left", "center", "right"}:
+        raise ValueError(f"unknown align {align!r}")
+    margin = opts.get("margin")
+    margin = style_spec.margin if margin in (None, "") else float(margin)
+
+    out = opts.get("out")
+    if not out:
+        stem = _safe_filename_stem(text)
+        out = os.path.join(os.getcwd(), f"{stem}.png")
+
+    kwargs = dict(
+        text=text,
+        subtitle=str(opts.get("subtitle") or ""),
+        size=tuple(size),
+        seed=seed,
+        style=style,
+        font_path=_find_font_path(opts.get("font")),
+        noise=pick("noise", style_spec.noise),
+        shapes=pick("shapes", style_spec.shapes),
+        vignette=pick("vignette", style_spec.vignette),
+        align=align,
+        margin_ratio=margin,
+        background_key=str(opts.get("background_key") or "") or None,
+        quality=str(opts.get("quality") or "high"),
+        threads=max(1, int(opts.get("threads") or 1)),
+    )
+    return kwargs, out
+
+
+def _variant_path(out: str, suffix: str) -> str:
+    stem, ext = os.path.splitext(out)
+    return f"{stem}-{suffix}{ext}"
+
+
+def _render_job(job: dict, defaults: dict) -> str:
+    """
+    Render and save one image described by `job` (see `_resolve_job`). Returns the output path.
+
+    A "variants" entry (see `_parse_variants`) also writes `{stem}-{variant}{ext}` files
+    from the same render. A "formats" entry (e.g. "webp,avif") writes each output again
+    as `{stem}.{format}`, and "encode" picks the ENCODE_PRESETS entry for all of them.
+    ".svg" outputs come from `generate_svg` instead ("svg_grain" embeds the grain tile).
+    """
+    kwargs, out = _resolve_job(job, defaults)
+    preset = str(job.get("encode") or defaults.get("encode") or "balanced")
+    _save_kwargs(".png", preset)  # validate before rendering
+    exts = _parse_formats(str(job.get("formats", defaults.get("formats")) or ""))
+    variants = job.get("variants", defaults.get("variants"))
+    size = kwargs.pop("size")
+    targets = [(out, size)]
+    if variants:
+        targets += [(_variant_path(out, suffix), vsize) for suffix, vsize in _parse_variants(str(variants), size)]
+
+    raster: list[Tuple[str, Tuple[int, int]]] = []
+    vector: list[Tuple[str, Tuple[int, int]]] = []
+    for path, target_size in targets:
+        stem, ext = os.path.splitext(path)
+        for p in [path] + [stem + e for e in exts if e != ext.lower()]:
+            (vector if p.lower().endswith(".svg") else raster).append((p, target_size))
+
+    if raster:
+        sizes = list(dict.fromkeys(s for _, s in raster))
+        images = dict(zip(sizes, generate_variants(sizes=sizes, **kwargs)))
+        _save_images([(images[s], p) for p, s in raster], preset)
+    if vector:
+        grain = bool(job.get("svg_grain", defaults.get("svg_grain")))
+        kwargs.pop("quality")
+        kwargs.pop("threads")
+        for path, target_size in vector:
+            svg = _staged("svg", generate_svg, size=target_size, grain=grain, **kwargs)
+            _ensure_parent_dir(path)
+            _staged("encode", _write_text, path, svg)
+    return out
+
+
+def _write_text(path: str, text: str) -> int:
+    data = text.encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+# Process-wide caches by name; each Renderer holds its own set with the same names.
+_CACHES = {
+    "fonts": _FONT_CACHE,
+    "ramps": _RAMP_CACHE,
+    "grain": _GRAIN_CACHE,
+    "vignette": _VIGNETTE_CACHE,
+    "backgrounds": _BACKGROUND_CACHE,
+    "svg_grain": _SVG_GRAIN_CACHE,
+    "svg_vignette": _SVG_VIGNETTE_CACHE,
+}
+# The caches of the Renderer rendering in this context; None means the process-wide ones.
+_CACHE_SCOPE: ContextVar[Optional[dict[str, _LRUCache]]] = ContextVar("_CACHE_SCOPE", default=None)
+
+
+def _cache(name: str) -> _LRUCache:
+    scope = _CACHE_SCOPE.get()
+    return (scope or _CACHES)[name]
+
+# Job keys Renderer.render accepts as options; outputs and formats are the caller's business.
+RENDER_OPTIONS = tuple(k for k in JOB_KEYS if k not in {"text", "subtitle", "out", "variants", "formats"})
+
+
+class Renderer:
+    """
+    Render covers repeatedly from Python, with warm state between calls.
+
+        with Renderer(style="neon", size=(1200, 630)) as r:
+            img = r.render("Go 包命名指南", "Go · 规范")       # PIL image
+            data = r.render("agent skills", format="webp")    # encoded bytes
+
+    The constructor resolves the font once and renders a small warm-up cover, so fonts,
+    grain tiles, vignette masks and gradient ramps are loaded before the first real call.
+    They live in LRU caches owned by this Renderer, with the names and default limits of
+    the process-wide `_CACHES` that plain `generate_image` callers use: `cache_limits`
+    caps entries per cache name, `cache_info()` reports usage and `close()` empties them,
+    without touching other Renderers. A Renderer may be shared between threads.
+    """
+
+    def __init__(
+        self,
+        style: str = "default",
+        size: Tuple[int, int] | str = (1600, 900),
+        font: Optional[str] = None,
+        quality: str = "high",
+        encode: str = "balanced",
+        threads: int = 1,
+        cache_limits: Optional[dict[str, int]] = None,
+        warm_up: bool = True,
+    ) -> None:
+        if style not in STYLES:
+            raise ValueError(f"unknown style {style!r}; choose from {', '.join(sorted(STYLES))}")
+        if quality not in QUALITY_SCALES:
+            raise ValueError(f"unknown quality {quality!r}; choose from {', '.join(QUALITY_SCALES)}")
+        _save_kwargs(".png", encode)  # validate
+        unknown = set(cache_limits or {}) - set(_CACHES)
+        if unknown:
+            raise ValueError(f"unknown cache {', '.join(sorted(unknown))}; choose from {', '.join(_CACHES)}")
+        limits = cache_limits or {}
+        self._caches = {
+            name: _LRUCache(limits.get(name, cache.maxsize), cache.maxweight, cache.weigh) for name, cache in _CACHES.items()
+        }
+
+        self.defaults = {
+            "style": style,
+            "size": _parse_size(size),
+            "font": _find_font_path(font),
+            "quality": quality,
+            "encode": encode,
+            "threads": threads,
+        }
+        self.closed = False
+        if warm_up:
+            self.render("warm up 预热", size=(640, 360))
+
+    def render(self, text: str, subtitle: str = "", *, format: Optional[str] = None, **options: Any) -> Image.Image | bytes:
+        """
+        Render one cover; `options` override the constructor defaults (see RENDER_OPTIONS).
+
+        Returns the image, or with `format` ("png", "jpg", "webp", "avif" or "svg") its
+        encoded bytes using the `encode` preset. Invalid values raise ValueError.
+        """
+        if self.closed:
+            raise RuntimeError("Renderer is closed")
+        unknown = set(options) - set(RENDER_OPTIONS)
+        if unknown:
+            raise TypeError(f"unexpected option(s): {', '.join(sorted(unknown))}")
+        token = _CACHE_SCOPE.set(self._caches)
+        try:
+            return self._render(text, subtitle, format, options)
+        finally:
+            _CACHE_SCOPE.reset(token)
+
+    def _render(self, text: str, subtitle: str, format: Optional[str], options: dict) -> Image.Image | bytes:
+        kwargs, _out = _resolve_job(dict(options, text=text, subtitle=subtitle), self.defaults)
+        if format is None:
+            return generate_image(**kwargs)
+
+        exts = _parse_formats(format)
+        if len(exts) != 1:
+            raise ValueError(f"expected one format, got {format!r}")
+        if exts[0] == ".svg":
+            kwargs.pop("quality")
+            kwargs.pop("threads")
+            return generate_svg(grain=bool(options.get("svg_grain")), **kwargs).encode("utf-8")
+        buf = io.BytesIO()
+        preset = str(options.get("encode") or self.defaults["encode"])
+        generate_image(**kwargs).save(buf, format=ENCODERS[exts[0]][0], **_save_kwargs(exts[0], preset))
+        return buf.getvalue()
+
+    def cache_info(self) -> dict[str, dict]:
+        """Entries, entry limit and (for image caches) bytes held, per cache name."""
+        return {
+            name: {"entries": len(cache), "maxsize": cache.maxsize, "bytes": cache.weight if cache.weigh else None}
+            for name, cache in self._caches.items()
+        }
+
+    def close(self) -> None:
+        """Release this Renderer's cached fonts, tiles, masks and backgrounds; later `render` calls raise."""
+        self.closed = True
+        for cache in self._caches.values():
+            cache.clear()
+
+    def __enter__(self) -> "Renderer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# Sample (title, subtitle) rows of the --gallery contact sheet when --text is not given.
+GALLERY_TITLES = (
+    ("Agent Skills", "agent · AI"),
+    ("Go 包命名的最佳实践：从 go-pkg-sdk 到 kit 的重构之旅", "Go · 编程规范 · 架构设计"),
+    ("Rendering 8K covers in parallel", "python · pillow · performance"),
+)
+GALLERY_CELL = (480, 270)
+
+
+def render_gallery(
+    styles: Sequence[str],
+    titles: Sequence[Tuple[str, str]],
+    defaults: dict,
+    cell: Tuple[int, int] = GALLERY_CELL,
+    threads: int = 1,
+) -> Image.Image:
+    """
+    Contact sheet with one column per style and one row per (title, subtitle), each
+    cell a `cell`-sized cover; columns are labeled with the style name.
+
+    `defaults` fills the other render settings as in `_resolve_job`. Cells render on
+    `threads` threads after the grain tiles and vignette masks they share (per size and
+    strength) are built once, so the threads don't race to build them.
+    """
+    cells = [
+        _resolve_job({"text": text, "subtitle": subtitle, "style": style, "size": cell}, defaults)[0]
+        for text, subtitle in titles
+        for style in styles
+    ]
+    for key in {(kw["size"], kw["noise"], kw["vignette"], kw["quality"]) for kw in cells}:
+        _warm_background(*key)
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+        images = list(pool.map(lambda kw: generate_image(**kw), cells))
+
+    pad, label = 16, 36
+    cw, ch = cell
+    sheet = Image.new("RGB", (pad + len(styles) * (cw + pad), pad + label + len(titles) * (ch + pad)), (22, 22, 26))
+    d = ImageDraw.Draw(sheet)
+    font = _load_font(_find_font_path(defaults.get("font")), 20)
+    for col, style in enumerate(styles):
+        d.text((pad + col * (cw + pad), pad + 4), style, font=font, fill=(228, 228, 232))
+    for i, img in enumerate(images):
+        row, col = divmod(i, len(styles))
+        sheet.paste(img, (pad + col * (cw + pad), pad + label + row * (ch + pad)))
+    return sheet
+
+
+def _run_gallery(
+    out: str, styles: Sequence[str], titles: Sequence[Tuple[str, str]], cell: Tuple[int, int], defaults: dict, threads: int
+) -> int:
+    t0 = time.perf_counter()
+    sheet = render_gallery(styles, titles, defaults, cell, threads)
+    _save_image(sheet, out, str(defaults.get("encode") or "balanced"))
+    seconds = time.perf_counter() - t0
+    print(f"Wrote {out} ({len(styles)} styles x {len(titles)} titles, {sheet.width}x{sheet.height}) in {seconds:.2f}s")
+    return 0
+
+
+def _load_manifest(path: str) -> list[dict]:
+    """
+    Read batch items from a .csv (header row with JOB_KEYS columns) or .jsonl manifest.
+
+    Lines that fail to parse become items carrying an "error" so they are reported
+    in the summary instead of aborting the whole batch.
+    """
+    items: list[dict] = []
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                items.append({k: v for k, v in row.items() if k and v not in (None, "")})
+            return items
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                item = json.loads(line)
+                if not isinstance(item, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                item = {"error": f"line {lineno}: {e}"}
+            items.append(item)
+    return items
+
+
+class JobResult(NamedTuple):
+    index: int
+    out: Optional[str]
+    error: Optional[str]
+    seconds: float
+    profile: Optional[dict] = None
+
+
+def _profiled_render(index: int, job: dict, defaults: dict, profile: Optional[dict]) -> Tuple[str, Optional[dict]]:
+    """
+    Render one job; with `profile` settings also return its RenderProfile record.
+
+    `profile["pstats_dir"]` additionally runs the render under cProfile and dumps
+    the stats there as render-{index}.pstats.
+    """
+    if profile is None:
+        return _render_job(job, defaults), None
+    prof = RenderProfile(index=index, text=job.get("text"))
+    profiler = cProfile.Profile() if profile.get("pstats_dir") else None
+    with observe_stages(prof):
+        if profiler is not None:
+            profiler.enable()
+        try:
+            out = _render_job(job, defaults)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    record = prof.finish()
+    record["out"] = out
+    if profiler is not None:
+        record["pstats"] = os.path.join(profile["pstats_dir"], f"render-{index}.pstats")
+        _ensure_parent_dir(record["pstats"])
+        profiler.dump_stats(record["pstats"])
+    return out, record
+
+
+def _batch_worker(payload: Tuple[int, dict, dict, Optional[dict]]) -> JobResult:
+    # Top-level so ProcessPoolExecutor can pickle it. Never raises: failures are per item.
+    index, job, defaults, profile = payload
+    t0 = time.perf_counter()
+    try:
+        if "error" in job:
+            raise ValueError(job["error"])
+        out, record = _profiled_render(index, job, defaults, profile)
+        return JobResult(index, out, None, time.perf_counter() - t0, record)
+    except Exception as e:
+        return JobResult(index, None, f"{type(e).__name__}: {e}", time.perf_counter() - t0)
+
+
+def _write_profiles(records: Sequence[dict], dest: str, top: int) -> None:
+    """
+    Append profile records as JSON lines to `dest` ("-" for stderr).
+
+    Only the `top` slowest renders keep their pstats files; the rest are deleted.
+    """
+    ranked = sorted((r for r in records if r.get("pstats")), key=lambda r: -r["total_ms"])
+    for r in ranked[max(0, top):]:
+        try:
+            os.remove(r["pstats"])
+        except OSError:
+            pass
+        r["pstats"] = None
+    lines = [json.dumps(r, ensure_ascii=False) for r in sorted(records, key=lambda r: r["index"])]
+    if dest == "-":
+        for line in lines:
+            print(line, file=sys.stderr)
+        return
+    _ensure_parent_dir(dest)
+    with open(dest, "a", encoding="utf-8") as f:
+        f.writelines(line + "\n" for line in lines)
+
+
+def _run_jobs(
+    items: Sequence[dict],
+    defaults: dict,
+    jobs: int,
+    profile: Optional[dict] = None,
+    executor: Optional[Executor] = None,
+) -> list[JobResult]:
+    """
+    Render `items` on up to `jobs` worker processes, printing one line per item as it finishes.
+
+    With `profile` settings ({"dest", "pstats_dir", "top"}), per-render profile records
+    are written to `profile["dest"]` once all items are done. A long-lived `executor`
+    (see `_watch_posts`) is used instead of starting a new pool.
+    """
+    jobs = max(1, min(jobs, len(items)))
+    payloads = [(i, item, defaults, profile) for i, item in enumerate(items, 1)]
+    done: list[JobResult] = []
+    owned = _process_pool(jobs) if executor is None and jobs > 1 else None
+    with owned or nullcontext():
+        executor = executor or owned
+        if executor is None:
+            results = map(_batch_worker, payloads)
+        else:
+            results = (f.result() for f in as_completed([executor.submit(_batch_worker, p) for p in payloads]))
+        for r in results:
+            if r.error is None:
+                print(f"  ok    #{r.index} {r.out} ({r.seconds * 1000:.0f} ms)")
+            else:
+                print(f"  FAIL  #{r.index} {r.error}")
+            done.append(r)
+    if profile is not None:
+        _write_profiles([r.profile for r in done if r.profile], profile["dest"], profile.get("top", 0))
+    return done
+
+
+def _process_pool(jobs: int, initializer: Callable[..., None] = _import_imaging, initargs: tuple = ()) -> Executor:
+    """
+    Worker processes that start with Pillow already imported.
+
+    Pillow is imported here first, so forked workers inherit it and a fork server
+    preloads it; under spawn, `initializer` imports it once per worker, before its first job.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    _import_imaging()
+    multiprocessing.set_forkserver_preload(list(PIL_MODULES))
+    return ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs)
+
+
+def _print_summary(rendered: int, skipped: int, errors: int, seconds: float) -> None:
+    print()
+    print("=" * 50)
+    print(f"Done: {rendered} rendered, {skipped} skipped, {errors} failed in {seconds:.1f}s")
+
+
+def _run_batch(manifest: str, defaults: dict, jobs: int, profile: Optional[dict] = None) -> int:
+    items = _load_manifest(manifest)
+    if not items:
+        print(f"No items in {manifest}")
+        return 1
+
+    print(f"Rendering {len(items)} item(s) from {manifest} with {max(1, min(jobs, len(items)))} worker(s)")
+    t0 = time.perf_counter()
+    results = _run_jobs(items, defaults, jobs, profile)
+    errors = sum(1 for r in results if r.error is not None)
+    _print_summary(len(results) - errors, 0, errors, time.perf_counter() - t0)
+    return 0 if errors == 0 else 1
+
+
+def _read_front_matter(path: str) -> dict:
+    """
+    Read the `---`-delimited YAML header of a post without loading the body.
+
+    Parsing is gen_svg_covers.py's (a stdlib-only sibling script), so both scripts
+    understand the same front matter subset, CRLF files included.
+    """
+    import gen_svg_covers
+
+    header = gen_svg_covers.read_front_matter(path)
+    return gen_svg_covers.parse_front_matter(header[0]) if header else {}
+
+
+def _job_hash(job: dict, defaults: dict) -> str:
+    """Content hash of everything that influences a rendered file, including RENDER_VERSION."""
+    opts = dict(defaults)
+    opts.update({k: v for k, v in job.items() if k in JOB_KEYS})
+    opts.pop("threads", None)  # Changes speed only, never pixels.
+    opts["version"] = RENDER_VERSION
+    blob = json.dumps(opts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _write_json_atomic(path: str, data: object) -> None:
+    _ensure_parent_dir(path)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+# Where --posts kept its manifest before it moved out of the content tree; read once, then removed.
+LEGACY_MANIFEST_NAME = ".covers-manifest.json"
+
+
+def _default_manifest(posts_dir: str) -> str:
+    """--posts manifest for this checkout's posts directory, under _cache_dir()."""
+    digest = hashlib.sha256(os.path.abspath(posts_dir).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(_cache_dir(), "manifests", f"{digest}.json")
+
+
+def _run_posts(
+    content_dir: str,
+    defaults: dict,
+    jobs: int,
+    cover_name: str,
+    manifest: Optional[str],
+    force: bool,
+    profile: Optional[dict] = None,
+    only: Optional[set] = None,
+    executor: Optional[Executor] = None,
+) -> int:
+    """
+    Render `cover_name` for every content/posts/*/index.md from its title (and tags as subtitle).
+
+    A manifest maps each output to the hash of its inputs; posts whose hash and
+    output file are unchanged are skipped without rendering. An existing output with
+    no manifest entry was not generated by us (e.g. a hand-picked photo) and is only
+    overwritten with `force`. `only` restricts the run to those post directory names.
+    """
+    posts_dir = os.path.join(content_dir, "posts")
+    if not os.path.isdir(posts_dir):
+        print(f"Posts directory not found: {posts_dir}")
+        return 1
+    manifest = manifest or _default_manifest(posts_dir)
+    legacy = os.path.join(posts_dir, LEGACY_MANIFEST_NAME)
+    entries = {}
+    for path in (manifest, legacy):
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f).get("covers", {})
+            break
+        except (OSError, ValueError):
+            pass
+
+    t0 = time.perf_counter()
+    todo: list[Tuple[str, str, dict]] = []
+    seen = set()
+    skipped = 0
+    foreign = 0
+    errors = 0
+    for name in sorted(os.listdir(posts_dir) if only is None else only):
+        index_file = os.path.join(posts_dir, name, "index.md")
+        if not os.path.isfile(index_file):
+            continue
+        fm = _read_front_matter(index_file)
+        title = fm.get("title")
+        if not isinstance(title, str) or not title.strip():
+            print(f"  FAIL  {name}: no title in front matter")
+            errors += 1
+            continue
+        tags = fm.get("tags")
+        job = {
+            "text": title,
+            "subtitle": " · ".join(tags) if isinstance(tags, list) else "",
+            "out": os.path.join(posts_dir, name, cover_name),
+        }
+        rel = f"{name}/{cover_name}"
+        key = _job_hash(dict(job, out=rel), defaults)  # repo-relative, so checkouts elsewhere still hit
+        seen.add(rel)
+        if not force and entries.get(rel) == key and os.path.exists(job["out"]):
+            skipped += 1
+            continue
+        if not force and rel not in entries and os.path.exists(job["out"]):
+            print(f"  skip  {rel}: exists and was not generated by us (use --force to overwrite)")
+            foreign += 1
+            continue
+        todo.append((rel, key, job))
+
+    print(f"{len(seen) + errors} post(s), {len(todo)} to render, {skipped} unchanged, {foreign} not ours")
+    results = _run_jobs([job for _, _, job in todo], defaults, jobs, profile, executor) if todo else []
+    for r in results:
+        rel, key, _job = todo[r.index - 1]
+        if r.error is None:
+            entries[rel] = key
+        else:
+            errors += 1
+            entries.pop(rel, None)
+
+    entries = {
+        rel: key for rel, key in entries.items() if rel in seen or (only is not None and rel.split("/", 1)[0] not in only)
+    }
+    _write_json_atomic(manifest, {"version": RENDER_VERSION, "covers": entries})
+    if os.path.abspath(legacy) != os.path.abspath(manifest):
+        try:
+            os.remove(legacy)
+        except OSError:
+            pass
+    rendered = len(results) - sum(1 for r in results if r.error is not None)
+    _print_summary(rendered, skipped + foreign, errors, time.perf_counter() - t0)
+    return 0 if errors == 0 else 1
+
+
+# inotify(7) constants; IN_NONBLOCK/IN_CLOEXEC equal O_NONBLOCK/O_CLOEXEC on Linux.
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_EVENT = struct.Struct("iIII")
+
+
+class _PollWatcher:
+    """Report post directories whose index.md changed, by comparing stat snapshots."""
+
+    kind = "polling"
+
+    def __init__(self, posts_dir: str, interval: float) -> None:
+        self.posts_dir = posts_dir
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        snap = {}
+        with os.scandir(self.posts_dir) as it:
+            for e in it:
+                try:
+                    st = os.stat(os.path.join(e.path, "index.md"))
+                except OSError:
+                    continue
+                snap[e.name] = (st.st_mtime_ns, st.st_size)
+        return snap
+
+    def poll(self, timeout: Optional[float]) -> set:
+        """Block up to `timeout` seconds (forever if None); return the changed post names."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snap = self._scan()
+            changed = {n for n in snap.keys() | self._snapshot.keys() if snap.get(n) != self._snapshot.get(n)}
+            self._snapshot = snap
+            if changed:
+                return changed
+            wait = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if wait <= 0:
+                return set()
+            time.sleep(wait)
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyWatcher:
+    """Linux inotify watch on posts_dir and each post directory, reporting index.md writes and renames."""
+
+    kind = "inotify"
+
+    def __init__(self, posts_dir: str) -> None:
+        import ctypes
+
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.posts_dir = posts_dir
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, str] = {}
+        self._root = self._add(posts_dir, _IN_CREATE | _IN_MOVED_TO | _IN_DELETE | _IN_ONLYDIR)
+        with os.scandir(posts_dir) as it:
+            for e in it:
+                if e.is_dir():
+                    self._add_post(e.name)
+
+    def _add(self, path: str, mask: int) -> int:
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def _add_post(self, name: str) -> None:
+        try:
+            wd = self._add(os.path.join(self.posts_dir, name), _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_ONLYDIR)
+        except OSError:
+            return  # removed again before we got to it
+        self._dirs[wd] = name
+
+    def poll(self, timeout: Optional[float]) -> set:
+        """Block up to `timeout` seconds (forever if None); return the changed post names."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not select.select([self.fd], [], [], wait)[0]:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed  # other files (covers, editor temp files) are ignored
+
+    def _read_events(self) -> set:
+        changed = set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        pos = 0
+        while pos < len(buf):
+            wd, mask, _cookie, length = _IN_EVENT.unpack_from(buf, pos)
+            name = buf[pos + _IN_EVENT.size : pos + _IN_EVENT.size + length].rstrip(b"\0").decode("utf-8", "replace")
+            pos += _IN_EVENT.size + length
+            if mask & _IN_Q_OVERFLOW:
+                changed.update(self._dirs.values())
+            elif mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+            elif wd == self._root and mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._add_post(name)
+                changed.add(name)
+            elif wd in self._dirs and name == "index.md":
+                changed.add(self._dirs[wd])
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _post_watcher(posts_dir: str, poll_interval: float) -> Any:
+    if sys.platform.startswith("linux"):
+        try:
+            return _InotifyWatcher(posts_dir)
+        except (OSError, AttributeError):
+            pass  # no inotify (or out of watches): fall back to polling
+    return _PollWatcher(posts_dir, poll_interval)
+
+
+def _warm_worker(defaults: dict) -> None:
+    # Load the font index, fonts and grain tiles once per process, before the first real render.
+    kwargs, _out = _resolve_job({"text": "warm up 预热", "size": (640, 360)}, defaults)
+    generate_image(**kwargs)
+
+
+def _watch_posts(
+    content_dir: str,
+    defaults: dict,
+    jobs: int,
+    cover_name: str,
+    manifest: Optional[str],
+    debounce: float,
+    poll_interval: float,
+    profile: Optional[dict] = None,
+) -> int:
+    """
+    Bring covers up to date like `_run_posts`, then re-render a post's cover whenever
+    its index.md is saved, until interrupted.
+
+    Saves are debounced: renders start once no event arrived for `debounce` seconds.
+    Workers (or this process, with jobs=1) stay alive and warm between events.
+    """
+    posts_dir = os.path.join(content_dir, "posts")
+    if not os.path.isdir(posts_dir):
+        print(f"Posts directory not found: {posts_dir}")
+        return 1
+    watcher = _post_watcher(posts_dir, poll_interval)
+    executor = None
+    if jobs > 1:
+        executor = _process_pool(jobs, _warm_worker, (defaults,))
+    else:
+        _warm_worker(defaults)
+    try:
+        _run_posts(content_dir, defaults, jobs, cover_name, manifest, False, profile, executor=executor)
+        print(f"Watching {posts_dir} ({watcher.kind}), Ctrl-C to stop")
+        while True:
+            changed = watcher.poll(None)
+            while True:
+                more = watcher.poll(debounce)
+                if not more:
+                    break
+                changed |= more
+            print()
+            print(f"Changed: {', '.join(sorted(changed))}")
+            _run_posts(content_dir, defaults, jobs, cover_name, manifest, False, profile, only=changed, executor=executor)
+    except KeyboardInterrupt:
+        print()
+        return 0
+    finally:
+        watcher.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
 def main(argv: Sequence[str]) -> int:
     p = argparse.ArgumentParser(description="Generate a blog background image from title/keywords.")
     p.add_argument("--list-styles", action="store_true", help="List available styles and exit.")
@@ -606,12 +2659,126 @@ def main(argv: Sequence[str]) -> int:
     p.add_argument("--out", required=False, help="Output path. If omitted, writes to ./{slugified-text}.png")
     p.add_argument("--size", default="1600x900", type=_parse_size, help="Image size, e.g. 1600x900")
     p.add_argument("--seed", type=int, default=None, help="Override deterministic seed (int).")
-    p.add_argument("--font", default=None, help="Font path (.ttf/.ttc). If omitted, auto-detect system fonts.")
+    p.add_argument(
+        "--font",
+        default=None,
+        help="Font path (.ttf/.ttc, 'file.ttc#N' selects face N). If omitted, auto-detect from the system font index.",
+    )
+    p.add_argument("--list-fonts", action="store_true", help="List fonts in the system font index and exit.")
     p.add_argument("--noise", type=float, default=None, help="Noise amount (0..2). If omitted, uses style preset.")
     p.add_argument("--shapes", type=float, default=None, help="Shapes density (0..2). If omitted, uses style preset.")
     p.add_argument("--vignette", type=float, default=None, help="Vignette strength (0..2). If omitted, uses style preset.")
     p.add_argument("--align", default=None, choices=["left", "center", "right"], help="Text alignment. If omitted, uses style preset.")
     p.add_argument("--margin", type=float, default=None, help="Margin ratio (e.g. 0.07). If omitted, uses style preset.")
+    p.add_argument(
+        "--quality",
+        default=None,
+        choices=list(QUALITY_SCALES),
+        help="Render quality: 'draft' for fast previews, 'high' (default; 'normal' for --gallery) for final covers.",
+    )
+    p.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Threads rendering each background in horizontal bands, for very large sizes; 0 = CPU count (default: 1).",
+    )
+    p.add_argument(
+        "--formats",
+        default=None,
+        help=f"Also write each output in these formats next to --out, e.g. 'webp,avif' "
+        f"(available: {', '.join(e[1:] for e in ENCODERS)}, svg; avif needs Pillow with AVIF support). Encoded concurrently.",
+    )
+    p.add_argument(
+        "--svg-grain",
+        action="store_true",
+        help="For .svg output, embed the grain as a small tiled PNG (adds ~10 KB).",
+    )
+    p.add_argument(
+        "--encode",
+        default="balanced",
+        choices=ENCODE_PRESETS,
+        help="Encoder preset: 'fast' (quick, larger files), 'balanced' (default) or 'smallest' (slow, fewest bytes).",
+    )
+    p.add_argument(
+        "--background-key",
+        default=None,
+        help="Seed the background from this key instead of the title and cache it, so retitling only redraws text.",
+    )
+    p.add_argument(
+        "--variants",
+        default=None,
+        help="Extra sizes rendered from the same background, e.g. 'og,thumb,2x' or '800x800'. "
+        "Each is written next to --out as {stem}-{variant}{ext}.",
+    )
+    p.add_argument(
+        "--batch",
+        default=None,
+        metavar="MANIFEST",
+        help="Render every item of a .jsonl/.csv manifest (keys: text, subtitle, style, size, out, seed, ...). "
+        "Other flags act as defaults for missing keys.",
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for --batch/--posts, threads for --gallery (default: CPU count).",
+    )
+    p.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="PATH",
+        help="Emit one JSON record per render (stage timings, intermediate image sizes, encode time/bytes), "
+        "appended to PATH as JSON lines, or to stderr if PATH is omitted.",
+    )
+    p.add_argument(
+        "--profile-pstats",
+        default=None,
+        metavar="DIR",
+        help="With --profile, also run renders under cProfile and keep pstats files for the slowest ones in DIR.",
+    )
+    p.add_argument("--profile-top", type=int, default=5, help="How many of the slowest renders keep pstats (default: 5).")
+    p.add_argument(
+        "--gallery",
+        default=None,
+        metavar="OUT",
+        help="Write a contact sheet of every style (columns) x sample titles (rows; or --text) to OUT, to compare styles.",
+    )
+    p.add_argument("--gallery-styles", default=None, help="Comma-separated styles for --gallery (default: all).")
+    p.add_argument(
+        "--gallery-cell",
+        default="x".join(map(str, GALLERY_CELL)),
+        type=_parse_size,
+        help=f"Cell size for --gallery (default: {GALLERY_CELL[0]}x{GALLERY_CELL[1]}).",
+    )
+    p.add_argument(
+        "--posts",
+        action="store_true",
+        help="Render a cover for every content/posts/*/index.md from its title/tags, skipping posts whose inputs are unchanged.",
+    )
+    p.add_argument("--content-dir", default=None, help="Content directory for --posts (default: <repo>/content).")
+    p.add_argument("--cover-name", default="cover.jpg", help="Cover filename written next to each index.md (default: cover.jpg).")
+    p.add_argument(
+        "--manifest", default=None, help="Hash manifest for --posts (default: one per posts directory under the user cache dir)."
+    )
+    p.add_argument(
+        "--force",
+        action="store_true",
+        help="With --posts, re-render even if the manifest says a cover is current, and overwrite covers it did not generate.",
+    )
+    p.add_argument(
+        "--watch",
+        action="store_true",
+        help="Like --posts, then keep running and re-render a post's cover whenever its index.md changes.",
+    )
+    p.add_argument("--debounce", type=float, default=0.25, help="With --watch, seconds of quiet before rendering (default: 0.25).")
+    p.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="With --watch, seconds between scans when inotify is unavailable (default: 1.0).",
+    )
     args = p.parse_args(argv)
 
     if args.list_styles:
@@ -620,49 +2787,68 @@ def main(argv: Sequence[str]) -> int:
             print(f"{name:9s}  theme={spec.theme:5s}  {spec.description}")
         return 0
 
-    if not args.text or not args.text.strip():
-        p.error("--text is required (unless --list-styles is set)")
-
-    style_spec = STYLES.get(args.style, STYLES["default"])
-    font_path = _find_font_path(args.font)
-    noise = style_spec.noise if args.noise is None else _clamp(args.noise, 0.0, 2.0)
-    shapes = style_spec.shapes if args.shapes is None else _clamp(args.shapes, 0.0, 2.0)
-    vignette = style_spec.vignette if args.vignette is None else _clamp(args.vignette, 0.0, 2.0)
-    align = style_spec.align if args.align is None else args.align
-    margin = style_spec.margin if args.margin is None else args.margin
-
-    out = args.out
-    if not out:
-        stem = _safe_filename_stem(args.text)
-        out = os.path.join(os.getcwd(), f"{stem}.png")
-
-    img = generate_image(
-        text=args.text,
-        subtitle=args.subtitle,
-        size=args.size,
-        seed=args.seed,
-        style=args.style,
-        font_path=font_path,
-        noise=noise,
-        shapes=shapes,
-        vignette=vignette,
-        align=align,
-        margin_ratio=margin,
-    )
+    if args.list_fonts:
+        index = _font_index()
+        for path in index["fonts"]:
+            print(path)
+        print(f"default: {index['default'] or '(Pillow built-in)'}")
+        return 0
 
-    _ensure_parent_dir(out)
+    defaults = {
+        "subtitle": args.subtitle,
+        "style": args.style,
+        "size": args.size,
+        "seed": args.seed,
+        "font": _find_font_path(args.font),
+        "noise": args.noise,
+        "shapes": args.shapes,
+        "vignette": args.vignette,
+        "align": args.align,
+        "margin": args.margin,
+        "variants": args.variants,
+        "background_key": args.background_key,
+        "quality": args.quality or "high",
+        "formats": args.formats,
+        "encode": args.encode,
+        "svg_grain": args.svg_grain,
+        "threads": args.threads or os.cpu_count() or 1,
+    }
+
+    profile = None
+    if args.profile:
+        profile = {"dest": args.profile, "pstats_dir": args.profile_pstats, "top": args.profile_top}
+
+    if args.batch:
+        return _run_batch(args.batch, defaults, jobs=args.jobs, profile=profile)
+    if args.gallery:
+        styles = [s.strip() for s in args.gallery_styles.split(",") if s.strip()] if args.gallery_styles else list(STYLES)
+        unknown = [s for s in styles if s not in STYLES]
+        if unknown or not styles:
+            p.error(f"--gallery-styles: unknown style(s) {', '.join(unknown)}; choose from {', '.join(sorted(STYLES))}")
+        titles = [(args.text, args.subtitle)] if args.text and args.text.strip() else list(GALLERY_TITLES)
+        try:
+            return _run_gallery(args.gallery, styles, titles, args.gallery_cell, dict(defaults, quality=args.quality or "normal"), args.jobs)
+        except ValueError as e:
+            p.error(str(e))
+    if args.posts or args.watch:
+        content_dir = args.content_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content")
+        if args.watch:
+            return _watch_posts(
+                content_dir, defaults, args.jobs, args.cover_name, args.manifest, args.debounce, args.poll_interval, profile
+            )
+        return _run_posts(content_dir, defaults, args.jobs, args.cover_name, args.manifest, args.force, profile)
 
-    ext = os.path.splitext(out.lower())[1]
-    save_kwargs = {}
-    if ext in {".jpg", ".jpeg"}:
-        save_kwargs = {"quality": 92, "subsampling": 1, "optimize": True}
-    elif ext == ".png":
-        save_kwargs = {"optimize": True}
+    if not args.text or not args.text.strip():
+        p.error("--text is required (unless --list-styles, --batch, --gallery, --posts or --watch is set)")
 
-    img.save(out, **save_kwargs)
+    try:
+        _out, record = _profiled_render(1, {"text": args.text, "out": args.out}, defaults, profile)
+    except ValueError as e:
+        p.error(str(e))
+    if record is not None:
+        _write_profiles([record], profile["dest"], profile["top"])
     return 0
 
 
 if __name__ == "__main__":
     raise SystemExit(main(sys.argv[1:]))
-
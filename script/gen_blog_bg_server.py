@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Serve gen_blog_bg.py covers over local HTTP, keeping fonts and caches warm between requests.
+
+Meant for `hugo server` previews and editor integrations: after the first request a
+cover only costs the render itself, and repeated requests are answered from memory
+or with 304 Not Modified.
+
+Usage:
+  python3 script/gen_blog_bg_server.py --port 8765 --concurrency 4
+  curl 'http://127.0.0.1:8765/render?text=agent%20skills&style=neon&format=jpeg' -o /tmp/bg.jpg
+  curl -X POST -d '{"text": "Go 包命名指南", "size": "1200x630"}' http://127.0.0.1:8765/render -o /tmp/og.png
+  curl http://127.0.0.1:8765/metrics
+
+Endpoints:
+  GET/POST /render   gen_blog_bg.py parameters (text, subtitle, style, size, seed, noise, shapes,
+                     vignette, align, margin) plus format=png|jpeg|webp, as a query string or JSON body.
+                     Responses carry an ETag derived from the inputs; covers are deterministic.
+  GET /metrics       Request counts, cache hits and latency percentiles as JSON.
+  GET /healthz       Liveness check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import gen_blog_bg
+
+# Request keys the server accepts; output paths and font files stay under the server's control.
+RENDER_KEYS = tuple(k for k in gen_blog_bg.JOB_KEYS if k not in {"out", "font", "variants", "formats", "encode", "svg_grain", "threads"})
+
+FORMATS = {
+    # Preview encoders favour speed over bytes; use gen_blog_bg.py for final covers.
+    "png": ("PNG", "image/png", {"compress_level": 1}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 90, "subsampling": 1}),
+    "webp": ("WEBP", "image/webp", gen_blog_bg._save_kwargs(".webp", "fast")),
+}
+
+
+class BusyError(Exception):
+    pass
+
+
+class RenderService:
+    """Render covers with a bounded number of concurrent renders and an LRU of encoded responses."""
+
+    def __init__(
+        self, defaults: dict, concurrency: int, queue_timeout: float, cache_size: int, max_size: Tuple[int, int] = (7680, 4320)
+    ) -> None:
+        self.defaults = defaults
+        self.max_size = max_size
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        self._responses = gen_blog_bg._LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=2048)
+        self._started = time.time()
+        self.counts = {"requests": 0, "rendered": 0, "cache_hits": 0, "not_modified": 0, "rejected": 0, "errors": 0}
+        self.in_flight = 0
+
+    def etag(self, params: dict, fmt: str) -> str:
+        job = {k: v for k, v in params.items() if k in RENDER_KEYS}
+        digest = hashlib.sha256(f"{gen_blog_bg._job_hash(job, self.defaults)}|{fmt}".encode("utf-8")).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def render(self, params: dict, fmt: str, etag: str) -> bytes:
+        body = self._responses.get(etag)
+        if body is not None:
+            self.count("cache_hits")
+            return body
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise BusyError("too many concurrent renders")
+        try:
+            with self._lock:
+                self.in_flight += 1
+            job = {k: v for k, v in params.items() if k in RENDER_KEYS}
+            kwargs, _out = gen_blog_bg._resolve_job(job, self.defaults, self.max_size)
+            img = gen_blog_bg.generate_image(**kwargs)
+            pil_format, _ctype, save_kwargs = FORMATS[fmt]
+            buf = io.BytesIO()
+            img.save(buf, format=pil_format, **save_kwargs)
+            body = buf.getvalue()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+        self._responses.put(etag, body)
+        self.count("rendered")
+        return body
+
+    def warm_up(self) -> None:
+        """Render one small cover so imports, the font index and fonts are loaded before the first request."""
+        kwargs, _out = gen_blog_bg._resolve_job({"text": "warm up 预热", "size": (640, 360)}, self.defaults)
+        gen_blog_bg.generate_image(**kwargs)
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.counts["requests"] += 1
+            self._latencies.append(seconds)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latencies)
+            counts = dict(self.counts)
+            in_flight = self.in_flight
+
+        def pct(p: float) -> Optional[float]:
+            if not lat:
+                return None
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 2)
+
+        return {
+            "uptime_s": round(time.time() - self._started, 1),
+            "in_flight": in_flight,
+            "cached_responses": len(self._responses),
+            **counts,
+            "latency_ms": {"p50": pct(0.50), "p90": pct(0.90), "p99": pct(0.99), "max": pct(1.0), "window": len(lat)},
+        }
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    server_version = "gen_blog_bg/" + gen_blog_bg.RENDER_VERSION
+    service: RenderService  # set on the subclass built in main()
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/render":
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            self._handle_render(params)
+        elif url.path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        elif url.path == "/healthz":
+            self._send_json(200, {"ok": True})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != "/render":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            self._send_json(400, {"error": f"bad JSON body: {e}"})
+            return
+        self._handle_render(params)
+
+    def _handle_render(self, params: dict) -> None:
+        t0 = time.perf_counter()
+        try:
+            fmt = str(params.pop("format", "png")).lower().replace("jpg", "jpeg")
+            if fmt not in FORMATS:
+                self._send_json(400, {"error": f"format must be one of {', '.join(FORMATS)}"})
+                return
+            etag = self.service.etag(params, fmt)
+            if etag in (t.strip() for t in (self.headers.get("If-None-Match") or "").split(",")):
+                self.service.count("not_modified")
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            try:
+                body = self.service.render(params, fmt, etag)
+            except BusyError as e:
+                self.service.count("rejected")
+                self._send_json(503, {"error": str(e)}, extra={"Retry-After": "1"})
+                return
+            except (ValueError, argparse.ArgumentTypeError) as e:
+                self.service.count("errors")
+                self._send_json(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self.service.count("errors")
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", FORMATS[fmt][1])
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "public, max-age=86400")
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            self.service.record_latency(time.perf_counter() - t0)
+
+    def _send_json(self, status: int, data: dict, extra: Optional[dict] = None) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        for k, v in (extra or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def main(argv: Sequence[str]) -> int:
+    p = argparse.ArgumentParser(description="Serve gen_blog_bg.py covers over local HTTP.")
+    p.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1).")
+    p.add_argument("--port", type=int, default=8765, help="Port (default: 8765).")
+    p.add_argument("--concurrency", type=int, default=4, help="Max renders running at once (default: 4).")
+    p.add_argument("--queue-timeout", type=float, default=10.0, help="Seconds a request waits for a render slot before 503.")
+    p.add_argument("--cache-size", type=int, default=256, help="Encoded responses kept in memory (default: 256).")
+    p.add_argument("--font", default=None, help="Font path for all renders. If omitted, auto-detect.")
+    p.add_argument("--style", default="default", choices=sorted(gen_blog_bg.STYLES.keys()), help="Default style preset.")
+    p.add_argument("--size", default="1600x900", type=gen_blog_bg._parse_size, help="Default image size.")
+    p.add_argument(
+        "--max-size",
+        default="7680x4320",
+        type=gen_blog_bg._parse_size,
+        help="Largest image (by pixel count) a request may ask for (default: 7680x4320).",
+    )
+    p.add_argument("--quiet", action="store_true", help="Do not log each request.")
+    args = p.parse_args(argv)
+
+    defaults = {
+        "subtitle": "",
+        "style": args.style,
+        "size": args.size,
+        "seed": None,
+        "font": gen_blog_bg._find_font_path(args.font),
+        "noise": None,
+        "shapes": None,
+        "vignette": None,
+        "align": None,
+        "margin": None,
+    }
+    service = RenderService(defaults, args.concurrency, args.queue_timeout, args.cache_size, args.max_size)
+    service.warm_up()
+
+    handler = type("Handler", (RenderHandler,), {"service": service})
+    httpd = ThreadingHTTPServer((args.host, args.port), handler)
+    httpd.daemon_threads = True
+    httpd.quiet = args.quiet
+    print(f"Serving covers on http://{args.host}:{httpd.server_port}/render (concurrency={args.concurrency})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -5,12 +5,26 @@
 Usage:
   python3 script/gen_svg_covers.py
   python3 script/gen_svg_covers.py --pattern new  # 使用新的图案
+  python3 script/gen_svg_covers.py --export-index data/posts.json  # 导出文章元数据供 Hugo 模板使用
+  python3 script/gen_svg_covers.py --shared  # 图案只写一份到 static/covers/，cover: 指向它
+  python3 script/gen_svg_covers.py --shared hardlink  # 每篇文章的 cover.svg 硬链接到共享文件
+  python3 script/gen_svg_covers.py --unique --force  # 用 gen_blog_bg.py 的矢量后端为每篇生成独有封面（需要 Pillow）
+
+文章索引保存在用户缓存目录（$XDG_CACHE_HOME/gen_svg_covers/）：只重新读取 mtime/大小有变化的文章。
+要提交或给 Hugo 模板使用的元数据请用 --export-index 导出。
 """
 
 import argparse
+import hashlib
+import json
 import os
 import re
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 # SVG 图案模板
 SVG_PATTERNS = {
@@ -20,65 +34,411 @@ SVG_PATTERNS = {
 }
 
 
-def find_all_posts(content_dir: str) -> list[Path]:
-    """查找所有文章目录"""
-    posts_dir = Path(content_dir) / "posts"
-    if not posts_dir.exists():
-        return []
-    
-    posts = []
-    for item in posts_dir.iterdir():
-        if item.is_dir():
-            index_file = item / "index.md"
-            if index_file.exists():
-                posts.append(item)
-    return sorted(posts)
+def read_front_matter(file_path: "Path | str") -> Optional[tuple[list[bytes], int]]:
+    """
+    只读取 `---` 包裹的 front matter 头部，不加载正文（gen_blog_bg.py --posts 也用这里的解析）。
 
+    返回 (头部各行（含换行符和首尾两条分隔线）, 正文起始字节偏移)；没有 front matter 时返回 None。
+    """
+    with open(file_path, "rb") as f:
+        lines = [f.readline()]
+        if lines[0].rstrip(b"\r\n") != b"---":
+            return None
+        for line in f:
+            lines.append(line)
+            if line.rstrip(b"\r\n") == b"---":
+                return lines, sum(map(len, lines))
+    return None
 
-def update_front_matter(file_path: Path, cover_name: str) -> bool:
-    """更新 front matter 中的 cover 字段"""
+
+def set_front_matter_key(lines: list[bytes], key: str, value: str) -> list[bytes]:
+    """设置 front matter（read_front_matter 返回的行）中的顶层 `key: value`，不存在时追加到末尾"""
+    prefix = key.encode("utf-8") + b":"
+    newline = lines[0][len(lines[0].rstrip(b"\r\n")):]
+    entry = prefix + b" " + value.encode("utf-8") + newline
+    out = list(lines)
+    for i in range(1, len(out) - 1):
+        if out[i].startswith(prefix):
+            out[i] = entry
+            return out
+    out.insert(len(out) - 1, entry)
+    return out
+
+
+def _replace_file(path: Path, write) -> None:
+    """先写入同目录临时文件再 os.replace，中途崩溃不会留下写了一半的文件"""
+    tmp = path.with_name(f".{path.name}.tmp{os.getpid()}.{threading.get_ident()}")
     try:
-        content = file_path.read_text(encoding="utf-8")
-        
-        # 检查是否已经有 cover 字段
-        cover_pattern = r"^cover:\s*.*$"
-        if re.search(cover_pattern, content, re.MULTILINE):
-            # 替换现有的 cover
-            new_content = re.sub(
-                cover_pattern,
-                f"cover: {cover_name}",
-                content,
-                flags=re.MULTILINE
-            )
-        else:
-            # 在 front matter 中添加 cover（在 draft 或 tags 之后）
-            # 查找 front matter 结束位置
-            front_matter_end = content.find("---\n", 4)  # 跳过第一个 ---
-            if front_matter_end == -1:
-                return False
-            
-            # 在 front matter 末尾添加 cover
-            insert_pos = front_matter_end
-            new_content = content[:insert_pos] + f"cover: {cover_name}\n" + content[insert_pos:]
-        
-        if new_content != content:
-            file_path.write_text(new_content, encoding="utf-8")
-            return True
-    except Exception as e:
-        print(f"  ❌ 更新 front matter 失败: {e}")
+        with open(tmp, "wb") as f:
+            write(f)
+        if path.exists():
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """内容不同时才（原子地）写入，返回是否写入"""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    _replace_file(path, lambda f: f.write(data))
+    return True
+
+
+def update_front_matter(file_path: Path, cover_name: str) -> bool:
+    """更新 front matter 中的 cover 字段，只在内容变化时重写文件；返回是否修改"""
+    header = read_front_matter(file_path)
+    if header is None:
+        raise ValueError("未找到 front matter")
+    lines, body_start = header
+    new_lines = set_front_matter_key(lines, "cover", cover_name)
+    if new_lines == lines:
         return False
-    return False
+
+    def write(f) -> None:
+        f.writelines(new_lines)
+        with open(file_path, "rb") as src:
+            src.seek(body_start)
+            shutil.copyfileobj(src, f)
+
+    _replace_file(file_path, write)
+    return True
 
 
 def generate_svg_cover(post_dir: Path, svg_content: str, cover_name: str = "cover.svg") -> bool:
-    """生成 SVG 封面文件"""
+    """生成 SVG 封面文件，返回是否写入（内容相同则不写）"""
+    return write_if_changed(post_dir / cover_name, svg_content.encode("utf-8"))
+
+
+# 共享图案放在 static/ 下的目录，同时也是站点上的相对路径（不带前导 /，baseURL 有子路径时 absURL 才正确）
+SHARED_DIR = "covers"
+
+
+def minify_svg(svg: str) -> str:
+    """去掉标签之间和多余的空白"""
+    svg = re.sub(r">\s+<", "><", svg.strip())
+    svg = re.sub(r"\s+", " ", svg)
+    return re.sub(r"\s+(/?>)", r"\1", svg)
+
+
+def write_shared_pattern(static_dir: Path, pattern: str, svg_content: str, dry_run: bool = False) -> tuple[Path, str]:
+    """
+    把图案写成带内容哈希的共享文件 static/covers/pattern-{pattern}.{hash}.svg（已存在则不写）。
+
+    返回 (文件路径, 写进 front matter 的 cover 值)。内容变化时文件名随之变化，可以长期缓存。
+    """
+    data = svg_content.encode("utf-8")
+    name = f"pattern-{pattern}.{_sha256(data)[:10]}.svg"
+    path = static_dir / SHARED_DIR / name
+    if not dry_run:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_if_changed(path, data)
+    return path, f"{SHARED_DIR}/{name}"
+
+
+def prune_shared_patterns(shared_dir: Path, keep: set) -> list[Path]:
+    """删除没有文章引用的旧共享图案（cover 值在 `keep` 中的保留）"""
+    removed = []
+    for path in sorted(shared_dir.glob("pattern-*.svg")):
+        if f"{SHARED_DIR}/{path.name}" not in keep:
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def link_svg_cover(post_dir: Path, asset: Path, cover_name: str = "cover.svg") -> bool:
+    """把文章的封面硬链接到共享图案（跨设备等无法硬链接时退回复制），返回是否修改"""
     cover_path = post_dir / cover_name
     try:
-        cover_path.write_text(svg_content, encoding="utf-8")
+        if os.path.samefile(cover_path, asset):
+            return False
+    except FileNotFoundError:
+        pass
+    tmp = cover_path.with_name(f".{cover_name}.tmp{os.getpid()}.{threading.get_ident()}")
+    try:
+        os.link(asset, tmp)
+    except OSError:
+        return write_if_changed(cover_path, asset.read_bytes())
+    os.replace(tmp, cover_path)
+    return True
+
+
+def _is_generated_cover(path: Path) -> bool:
+    """文件内容是否为本脚本生成的某个图案（原样或压缩后）"""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return False
+    return any(data in (svg.encode("utf-8"), minify_svg(svg).encode("utf-8")) for svg in SVG_PATTERNS.values())
+
+
+LEGACY_INDEX_NAME = ".posts-index.json"  # 旧版本放在 content/posts/ 里的索引，保存新索引后删除
+INDEX_VERSION = 1
+
+
+def index_path_for(posts_dir: Path) -> Path:
+    """posts_dir 对应的索引文件：按绝对路径区分，放在 $XDG_CACHE_HOME/gen_svg_covers/ 下，不进内容目录"""
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    digest = hashlib.sha256(str(posts_dir.resolve()).encode("utf-8")).hexdigest()[:16]
+    return base / "gen_svg_covers" / f"posts-index-{digest}.json"
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_front_matter(lines: list[bytes]) -> dict:
+    """
+    解析 read_front_matter 返回的头部行。
+
+    只支持文章里用到的子集：`key: 标量`、`key: [a, "b"]` 以及块列表（`key:` 后跟 `  - item`）。
+    """
+    data: dict = {}
+    key = None
+    for raw in lines[1:-1]:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        m = re.match(r"^([A-Za-z0-9_-]+):\s*(.*)$", line)
+        if m:
+            key, value = m.group(1), m.group(2).strip()
+            if value.startswith("[") and value.endswith("]"):
+                data[key] = [_unquote(v) for v in value[1:-1].split(",") if v.strip()]
+            else:
+                data[key] = _unquote(value) if value else []
+        elif key and isinstance(data.get(key), list) and re.match(r"^\s*-\s+", line):
+            data[key].append(_unquote(line.strip()[1:]))
+    return data
+
+
+def load_index(index_path: Path) -> dict:
+    """读取文章索引 {文章目录名: 条目}；文件缺失、损坏或版本不符时返回空索引"""
+    try:
+        data = json.loads(index_path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    return data.get("posts", {})
+
+
+def save_index(index_path: Path, posts: dict) -> bool:
+    data = {"version": INDEX_VERSION, "posts": posts}
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    return write_if_changed(index_path, json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+
+def index_post(post_dir: Path, old: Optional[dict]) -> Optional[dict]:
+    """
+    返回文章的索引条目（index.md 的 mtime/大小、front matter 及其哈希、cover 及其哈希）。
+
+    只有 stat 结果与 `old` 不同时才读取 index.md / 封面文件；没有 index.md 时返回 None。
+    """
+    try:
+        st = os.stat(post_dir / "index.md")
+    except FileNotFoundError:
+        return None
+    if old and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size:
+        entry = dict(old)
+    else:
+        header = read_front_matter(post_dir / "index.md")
+        lines = header[0] if header else [b"---\n", b"---\n"]
+        front_matter = parse_front_matter(lines)
+        entry = {
+            "path": f"posts/{post_dir.name}/index.md",
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "front_matter": front_matter,
+            "front_matter_hash": _sha256(b"".join(lines)),
+        }
+
+    cover = entry["front_matter"].get("cover")
+    cover = cover if isinstance(cover, str) and cover else None
+    cover_stat = None
+    if cover and "/" not in cover:  # 共享图案（covers/...）或外链不在文章目录里
+        try:
+            cover_stat = os.stat(post_dir / cover)
+        except FileNotFoundError:
+            pass
+    if cover_stat is None:
+        entry.update(cover=cover, cover_hash=None, cover_mtime_ns=None)
+    elif (
+        old is None
+        or old.get("cover") != cover
+        or old.get("cover_mtime_ns") != cover_stat.st_mtime_ns
+        or old.get("cover_hash") is None
+    ):
+        entry.update(cover=cover, cover_hash=_sha256((post_dir / cover).read_bytes()), cover_mtime_ns=cover_stat.st_mtime_ns)
+    return entry
+
+
+def scan_posts(posts_dir: Path, index: dict) -> dict:
+    """用一次 os.scandir 对比索引，返回最新的 {文章目录名: 条目}；只读取新增或变化的文章"""
+    posts = {}
+    with os.scandir(posts_dir) as it:
+        for e in it:
+            if e.name.startswith(".") or not e.is_dir():
+                continue
+            entry = index_post(Path(e.path), index.get(e.name))
+            if entry is not None:
+                posts[e.name] = entry
+    return dict(sorted(posts.items()))
+
+
+def export_index(posts: dict, out_path: Path) -> bool:
+    """把文章元数据导出为 JSON（按日期倒序），供其他工具和 Hugo 模板（data/ 目录）使用"""
+    items = [
+        dict(entry["front_matter"], slug=name, path=entry["path"], cover_hash=entry.get("cover_hash"))
+        for name, entry in posts.items()
+    ]
+    items.sort(key=lambda item: (str(item.get("date") or ""), item["slug"]), reverse=True)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    return write_if_changed(out_path, (json.dumps({"posts": items}, ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+
+
+def process_post(
+    post_dir: Path,
+    svg_content: str,
+    cover_name: str,
+    dry_run: bool,
+    force: bool,
+    entry: Optional[dict] = None,
+    shared: Optional[tuple[str, Path, str]] = None,
+) -> tuple[str, list[str]]:
+    """
+    处理单篇文章，返回 (状态: updated/skipped/error, 输出行)；`entry` 为该文章的索引条目。
+
+    `shared` 为 (模式, 共享文件, cover 值)：模式 "path" 时 front matter 直接引用共享文件，
+    不再在文章目录写 SVG；"hardlink" 时文章的 cover.svg 是共享文件的硬链接。
+    """
+    cover_path = post_dir / cover_name
+    lines = [f"📄 {post_dir.name}"]
+    if shared and shared[0] == "path":
+        return _process_post_shared(post_dir, cover_path, shared[2], dry_run, force, entry, lines)
+
+    # 索引显示封面与 front matter 都已是目标值时，无需读取任何文件
+    if entry and entry.get("cover") == cover_name and entry.get("cover_hash") == _sha256(svg_content.encode("utf-8")):
+        lines.append(f"  ⏭️  {cover_name} 无变化（索引）")
+        return "skipped", lines
+
+    # 检查是否已存在
+    if cover_path.exists() and not force:
+        lines.append(f"  ⏭️  已存在 {cover_name}，跳过（使用 --force 强制覆盖）")
+        return "skipped", lines
+
+    if dry_run:
+        lines.append(f"  ✨ 将生成: {cover_name}")
+        lines.append(f"  ✨ 将更新: index.md")
+        return "updated", lines
+
+    # 生成 SVG
+    try:
+        if shared:
+            changed = link_svg_cover(post_dir, shared[1], cover_name)
+        else:
+            changed = generate_svg_cover(post_dir, svg_content, cover_name)
+    except OSError as e:
+        lines.append(f"  ❌ 生成 SVG 失败: {e}")
+        return "error", lines
+    lines.append(f"  ✅ 已生成: {cover_name}" if changed else f"  ✅ {cover_name} 无变化")
+
+    # 更新 front matter
+    try:
+        if update_front_matter(post_dir / "index.md", cover_name):
+            lines.append(f"  ✅ 已更新: index.md")
+            return "updated", lines
+    except (OSError, ValueError) as e:
+        lines.append(f"  ❌ 更新 front matter 失败: {e}")
+        return "error", lines
+    lines.append(f"  ⚠️  front matter 未更新（可能已存在相同值）")
+    return ("updated" if changed else "skipped"), lines
+
+
+def unique_cover_renderer(index: dict, style: str):
+    """返回 文章目录名 -> 独有矢量封面 的函数（按索引里的标题和标签，用 gen_blog_bg.generate_svg 生成）"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import gen_blog_bg
+
+    if style not in gen_blog_bg.STYLES:
+        raise ValueError(f"未知样式 {style!r}，可选: {', '.join(sorted(gen_blog_bg.STYLES))}")
+
+    def render(name: str) -> str:
+        front_matter = index[name]["front_matter"]
+        title = front_matter.get("title")
+        tags = front_matter.get("tags")
+        job = {
+            "text": title if isinstance(title, str) and title.strip() else name,
+            "subtitle": " · ".join(tags) if isinstance(tags, list) else "",
+            "style": style,
+        }
+        kwargs, _out = gen_blog_bg._resolve_job(job, {})
+        kwargs.pop("quality")
+        kwargs.pop("threads")
+        return gen_blog_bg.generate_svg(**kwargs)
+
+    return render
+
+
+def _replaceable_cover(post_dir: Path, cover: Optional[str]) -> bool:
+    """cover 能否换成共享图案：未设置、指向不存在的本地文件、本脚本生成的封面或已是共享图案"""
+    if not cover or cover.startswith(f"{SHARED_DIR}/pattern-"):
         return True
-    except Exception as e:
-        print(f"  ❌ 生成 SVG 失败: {e}")
+    if "/" in cover or ":" in cover:  # 外链或其他目录里的图片，都是作者自己选的
         return False
+    path = post_dir / cover
+    return not path.exists() or _is_generated_cover(path)
+
+
+def _process_post_shared(
+    post_dir: Path,
+    cover_path: Path,
+    cover_value: str,
+    dry_run: bool,
+    force: bool,
+    entry: Optional[dict],
+    lines: list[str],
+) -> tuple[str, list[str]]:
+    """--shared path 模式：只改 front matter，并删除文章目录里遗留的生成封面；文章自己的封面除非 --force 否则保留"""
+    if entry and entry.get("cover") == cover_value and not cover_path.exists():
+        lines.append(f"  ⏭️  已引用 {cover_value}（索引）")
+        return "skipped", lines
+    if entry is not None:
+        current = entry.get("cover")
+    else:
+        header = read_front_matter(post_dir / "index.md")
+        current = parse_front_matter(header[0]).get("cover") if header else None
+        current = current if isinstance(current, str) else None
+    if not force and not _replaceable_cover(post_dir, current):
+        lines.append(f"  ⏭️  已有自己的封面 {current}，跳过（使用 --force 强制替换）")
+        return "skipped", lines
+    if dry_run:
+        lines.append(f"  ✨ 将引用: {cover_value}")
+        return "updated", lines
+
+    try:
+        changed = update_front_matter(post_dir / "index.md", cover_value)
+        if changed:
+            lines.append(f"  ✅ 已更新: index.md → {cover_value}")
+        if _is_generated_cover(cover_path):
+            cover_path.unlink()
+            lines.append(f"  🗑️  已删除旧的 {cover_path.name}")
+            changed = True
+    except (OSError, ValueError) as e:
+        lines.append(f"  ❌ 更新失败: {e}")
+        return "error", lines
+    if not changed:
+        lines.append(f"  ⏭️  已引用 {cover_value}")
+    return ("updated" if changed else "skipped"), lines
 
 
 def main():
@@ -104,6 +464,41 @@ def main():
         action="store_true",
         help="即使已存在 cover.svg 也覆盖"
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="并发处理的文章数（默认: min(8, CPU 核数)）"
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="忽略缓存的文章索引，重新读取所有文章"
+    )
+    parser.add_argument(
+        "--export-index",
+        default=None,
+        metavar="PATH",
+        help="把文章元数据导出为 JSON（相对路径基于仓库根目录，如 data/posts.json）"
+    )
+    parser.add_argument(
+        "--unique",
+        action="store_true",
+        help="按标题/标签为每篇文章生成独有的矢量封面（gen_blog_bg.py 的 SVG 后端），代替固定图案"
+    )
+    parser.add_argument(
+        "--style",
+        default="default",
+        help="--unique 使用的 gen_blog_bg.py 样式（默认: default）"
+    )
+    parser.add_argument(
+        "--shared",
+        nargs="?",
+        const="path",
+        choices=["path", "hardlink"],
+        default=None,
+        help=f"图案只写一份压缩后的共享文件到 static/{SHARED_DIR}/：path（默认）让 cover: 指向它，hardlink 让每篇的 cover.svg 硬链接到它"
+    )
     args = parser.parse_args()
     
     # 获取工作目录
@@ -118,55 +513,73 @@ def main():
     # 获取 SVG 内容
     svg_content = SVG_PATTERNS[args.pattern]
     cover_name = "cover.svg"
+    if args.unique and args.shared:
+        parser.error("--unique 与 --shared 不能同时使用")
+    shared = None
+    if args.shared:
+        svg_content = minify_svg(svg_content)
+        asset, cover_value = write_shared_pattern(workspace_root / "static", args.pattern, svg_content, args.dry_run)
+        shared = (args.shared, asset, cover_value)
     
-    # 查找所有文章
-    posts = find_all_posts(str(content_dir))
-    if not posts:
+    # 查找所有文章（对比索引，只读取新增或变化的文章）
+    posts_dir = content_dir / "posts"
+    if not posts_dir.is_dir():
+        print("❌ 未找到任何文章")
+        return 1
+    index_path = index_path_for(posts_dir)
+    index = scan_posts(posts_dir, {} if args.rescan else load_index(index_path))
+    if not index:
         print("❌ 未找到任何文章")
         return 1
     
-    print(f"📝 找到 {len(posts)} 篇文章")
-    print(f"🎨 使用图案样式: {args.pattern}")
+    svg_for = None
+    if args.unique:
+        try:
+            svg_for = unique_cover_renderer(index, args.style)
+        except (ImportError, ValueError) as e:
+            print(f"❌ --unique 不可用: {e}")
+            return 1
+    
+    print(f"📝 找到 {len(index)} 篇文章")
+    print(f"🎨 使用图案样式: {f'unique（{args.style}）' if args.unique else args.pattern}")
+    if shared:
+        print(f"🔗 共享图案: {shared[2]}（{shared[0]}）")
     if args.dry_run:
         print("🔍 预览模式（不会实际修改文件）")
     print()
     
-    updated = 0
-    skipped = 0
-    errors = 0
+    def run_post(name: str) -> tuple[str, list[str]]:
+        post_svg = svg_content
+        if svg_for:
+            try:
+                post_svg = svg_for(name)
+            except Exception as e:  # 单篇渲染失败只算这篇的错误，不中断整批
+                return "error", [f"📄 {name}", f"  ❌ 生成封面失败: {type(e).__name__}: {e}"]
+        return process_post(posts_dir / name, post_svg, cover_name, args.dry_run, args.force, index[name], shared)
+
+    counts = {"updated": 0, "skipped": 0, "error": 0}
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = pool.map(run_post, list(index))
+        for name, (status, lines) in zip(list(index), results):
+            print("\n".join(lines))
+            counts[status] += 1
+            if status == "updated" and not args.dry_run:
+                index[name] = index_post(posts_dir / name, index[name]) or index[name]
+    updated, skipped, errors = counts["updated"], counts["skipped"], counts["error"]
     
-    for post_dir in posts:
-        post_name = post_dir.name
-        index_file = post_dir / "index.md"
-        cover_path = post_dir / cover_name
-        
-        print(f"📄 {post_name}")
-        
-        # 检查是否已存在
-        if cover_path.exists() and not args.force:
-            print(f"  ⏭️  已存在 {cover_name}，跳过（使用 --force 强制覆盖）")
-            skipped += 1
-            continue
-        
-        if args.dry_run:
-            print(f"  ✨ 将生成: {cover_name}")
-            print(f"  ✨ 将更新: index.md")
-            updated += 1
-        else:
-            # 生成 SVG
-            if generate_svg_cover(post_dir, svg_content, cover_name):
-                print(f"  ✅ 已生成: {cover_name}")
-            else:
-                print(f"  ❌ 生成失败")
-                errors += 1
-                continue
-            
-            # 更新 front matter
-            if update_front_matter(index_file, cover_name):
-                print(f"  ✅ 已更新: index.md")
-                updated += 1
-            else:
-                print(f"  ⚠️  front matter 未更新（可能已存在相同值）")
+    if not args.dry_run:
+        if shared:
+            referenced = {entry.get("cover") for entry in index.values()} | {shared[2]}
+            for path in prune_shared_patterns(shared[1].parent, referenced):
+                print(f"🗑️  已删除未引用的共享图案: {path.name}")
+        save_index(index_path, index)
+        (posts_dir / LEGACY_INDEX_NAME).unlink(missing_ok=True)
+        if args.export_index:
+            export_path = Path(args.export_index)
+            if not export_path.is_absolute():
+                export_path = workspace_root / export_path
+            if export_index(index, export_path):
+                print(f"📦 已导出文章索引: {export_path}")
     
     print()
     print("=" * 50)
@@ -176,5 +589,4 @@ def main():
 
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main())